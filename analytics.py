@@ -0,0 +1,85 @@
+"""Closed-form attendance arithmetic.
+
+Every function accepts plain ints, NumPy arrays or pandas Series, so the
+per-subject numbers and the overall totals come from the same formulas.
+Thresholds are percentages and are converted to an exact fraction, so the
+answers are exact integers with no floating point drift at the boundary.
+"""
+from fractions import Fraction
+
+import numpy as np
+
+import config
+
+
+def _ratio(threshold):
+    """Return the threshold percentage as a reduced fraction (num, den)."""
+    threshold = config.ATTENDANCE_THRESHOLD if threshold is None else threshold
+    ratio = Fraction(str(threshold)) / 100
+    if not 0 < ratio < 1:
+        raise ValueError(f"Attendance threshold must be between 0 and 100, got {threshold}")
+    return ratio.numerator, ratio.denominator
+
+
+def _non_negative(values):
+    values = np.maximum(values, 0)
+    return int(values) if np.ndim(values) == 0 else values
+
+
+def bunk_limit(attended, total, threshold=None):
+    """Most lectures that can be missed while staying at or above ``threshold``.
+
+    Largest b with attended / (total + b) >= threshold, or 0 when already
+    below it.
+    """
+    num, den = _ratio(threshold)
+    return _non_negative((attended * den - total * num) // num)
+
+
+def lectures_to_attend(attended, total, threshold=None):
+    """Fewest consecutive lectures to attend to reach ``threshold``.
+
+    Smallest x with (attended + x) / (total + x) >= threshold, or 0 when
+    already there.
+    """
+    num, den = _ratio(threshold)
+    # Ceiling division: -(-a // b)
+    return _non_negative(-((attended * den - total * num) // (den - num)))
+
+
+def term_budget(attended, total, upcoming, threshold=None):
+    """Lectures out of ``upcoming`` that can be missed and still end the term at ``threshold``.
+
+    Largest m with (attended + upcoming - m) / (total + upcoming) >= threshold.
+    Negative when the threshold is out of reach even attending everything.
+    """
+    num, den = _ratio(threshold)
+    return ((attended + upcoming) * den - (total + upcoming) * num) // den
+
+
+def percentage(attended, total):
+    """Attendance percentage, 0 where no lectures have been held."""
+    attended = np.asarray(attended, dtype=float)
+    total = np.asarray(total, dtype=float)
+    result = np.divide(attended * 100, total, out=np.zeros_like(total), where=total > 0)
+    return float(result) if result.ndim == 0 else result
+
+
+def summarize(records, threshold=None):
+    """Overall totals and bunk/attend counts for a list of attendance records."""
+    total_attended = sum(record["Attended"] for record in records)
+    total_lectures = sum(record["Total"] for record in records)
+    return {
+        "attended": total_attended,
+        "total": total_lectures,
+        "percentage": percentage(total_attended, total_lectures),
+        "can_miss": bunk_limit(total_attended, total_lectures, threshold),
+        "to_attend": lectures_to_attend(total_attended, total_lectures, threshold),
+    }
+
+
+def add_subject_columns(df, threshold=None):
+    """Add "Can Miss" and "Need to Attend" columns to a records DataFrame."""
+    df["Can Miss"] = bunk_limit(df["Attended"], df["Total"], threshold)
+    df["Need to Attend"] = lectures_to_attend(df["Attended"], df["Total"], threshold)
+    return df
@@ -0,0 +1,171 @@
+"""A small JSON API over ``core``, for bots and dashboards.
+
+    python api_server.py --port 8080
+
+    POST /attendance        {"username": ..., "password": ..., "refresh": false, "threshold": 75}
+    POST /attendance/batch  {"students": [{"username": ..., "password": ...}, ...], "workers": 4}
+    GET  /health
+
+``/attendance`` answers with the same report as ``core.fetch``.
+``/attendance/batch`` streams one JSON line per student (NDJSON) as each
+finishes. Credentials are only accepted in the request body. Every fetch
+goes through the shared job queue: a single fetch that finds it full is
+answered 503 with a ``Retry-After`` header, and a batch waits its turn,
+instead of either piling up browsers.
+"""
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+import core
+import jobs
+
+logger = logging.getLogger(__name__)
+
+# Largest request body accepted, in bytes
+MAX_BODY = 1024 * 1024
+
+
+class ApiError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "AttendanceApi/1.0"
+
+    def do_GET(self):
+        if self.path == "/health":
+            return self._send_json(200, {"status": "ok", "queue": jobs.get_queue().stats()})
+        self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        try:
+            if self.path == "/attendance":
+                return self._send_json(200, self._fetch_one(self._read_json()))
+            if self.path == "/attendance/batch":
+                return self._fetch_batch(self._read_json())
+            raise ApiError(404, "Not found")
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)}, e.headers)
+
+    def _fetch_one(self, body):
+        username, password = _credentials(body)
+        try:
+            job = jobs.get_queue().submit(core.fetch, username, password, _backend(body),
+                                          bool(body.get("refresh")), _threshold(body))
+        except jobs.Busy as e:
+            raise ApiError(503, str(e), {"Retry-After": str(e.retry_after)})
+        job.wait()
+        if job.error is not None:
+            raise _error_for(job.error)
+        return job.result
+
+    def _fetch_batch(self, body):
+        students = body.get("students")
+        if not isinstance(students, list) or not students:
+            raise ApiError(400, "'students' must be a non-empty list")
+        credentials = [_credentials(student) for student in students]
+        backend, threshold = _backend(body), _threshold(body)
+        workers = body.get("workers") or config.BATCH_WORKERS
+        if isinstance(workers, bool) or not isinstance(workers, int) or workers < 1:
+            raise ApiError(400, "'workers' must be a positive integer")
+        workers = min(workers, config.BATCH_WORKERS)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        # HTTP/1.0: the stream ends when the connection closes
+        for line in core.fetch_many(credentials, workers, backend, threshold):
+            self.wfile.write(json.dumps(line).encode() + b"\n")
+            self.wfile.flush()
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            raise ApiError(413, "Request body too large")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ApiError(400, "Request body must be JSON")
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+        return body
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+
+def _credentials(body):
+    username = body.get("username") if isinstance(body, dict) else None
+    password = body.get("password") if isinstance(body, dict) else None
+    if not isinstance(username, str) or not username.strip() or not isinstance(password, str) or not password:
+        raise ApiError(400, "'username' and 'password' are required")
+    return username.strip(), password
+
+
+def _backend(body):
+    backend = body.get("backend")
+    if backend not in (None, "selenium", "api"):
+        raise ApiError(400, "'backend' must be 'selenium' or 'api'")
+    return backend
+
+
+def _threshold(body):
+    threshold = body.get("threshold")
+    if threshold is not None and (isinstance(threshold, bool) or not isinstance(threshold, (int, float))
+                                  or not 0 < threshold < 100):
+        raise ApiError(400, "'threshold' must be a percentage")
+    return threshold
+
+
+def _error_for(error):
+    import erp_api
+    import ratelimit
+
+    if isinstance(error, erp_api.InvalidCredentials):
+        return ApiError(401, str(error))
+    if isinstance(error, ratelimit.Throttled):
+        return ApiError(503, str(error), {"Retry-After": str(int(config.ERP_THROTTLE_TIMEOUT))})
+    logger.warning("Fetch failed: %s", error)
+    return ApiError(502, str(error) or type(error).__name__)
+
+
+def serve(port=0, host="127.0.0.1"):
+    """Create the API server; call ``serve_forever`` on it to start answering."""
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=config.API_HOST)
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    server = serve(args.port, args.host)
+    print(f"Attendance API listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
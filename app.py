@@ -1,15 +1,20 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-import time
-import re
-from selenium.webdriver.chrome.service import Service as ChromeService
-import matplotlib.pyplot as plt
-from webdriver_manager.chrome import ChromeDriverManager
-import io
-import base64
 import streamlit as st
 import pandas as pd
 import datetime
+import time
+import analytics
+import cache
+import config
+import history
+import jobs
+import metrics
+import planner
+from charts import generate_chart, generate_pie_chart
+from driver_pool import get_pool
+from erp_parser import NO_LECTURES
+from scraper import fetch_records
+
+THRESHOLD = config.ATTENDANCE_THRESHOLD
 
 # Set page configuration
 st.set_page_config(
@@ -70,158 +75,117 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def fetch_attendance(username, password):
-    with st.spinner('Fetching your attendance data...'):
-        try:
-            options = webdriver.ChromeOptions()
-            options.add_argument("--headless")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--disable-gpu")  # Add this line
-            
-            service = ChromeService(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=options)
-
-            driver.get("https://learner.pceterp.in/")
-            time.sleep(2)  # Increased sleep time
-
-            driver.find_element(By.XPATH, "//input[@type='text']").send_keys(username)
-            driver.find_element(By.XPATH, "//input[@type='password']").send_keys(password)
-            driver.find_element(By.XPATH, "//button[contains(@class, 'v-btn') and contains(., 'Sign In')]").click()
-            time.sleep(3)  # Increased sleep time
-
-            driver.get("https://learner.pceterp.in/attendance")
-            time.sleep(3)  # Increased sleep time
-
-            try:
-                student_name_element = driver.find_element(By.XPATH, "//span[contains(@class, 'ml-3 font-weight-bold text-medium-emphasis')]")
-                student_name = student_name_element.text.strip()
-            except Exception as e:
-                st.error(f"Error fetching student name: {e}")
-                student_name = "Unknown"
-
-            subject_blocks = driver.find_elements(By.XPATH, "//div[contains(@class, 'v-col-sm-4')]")
-
-            attendance_records = []
-            total_attended = 0
-            total_lectures = 0
-
-            for block in subject_blocks:
-                try:
-                    subject_name = block.find_element(By.XPATH, ".//div[@class='pb-5']").text.split("\n")[-1]
-                    attendance_text = block.find_element(By.XPATH, ".//span[contains(text(), '/')]").text.strip()
-                    percentage = block.find_element(By.XPATH, ".//div[@class='v-progress-circular__content']").text.strip()
-
-                    try:
-                        attendance_type = block.find_element(By.XPATH, ".//div[@class='v-chip__content']").text.strip().split()[0]
-                    except:
-                        attendance_type = "Unknown"
-
-                    match = re.search(r'(\d+) / (\d+)', attendance_text)
-                    if match:
-                        attended, total = map(int, match.groups())
-                    else:
-                        attended, total = 0, 0
-
-                    if total == 0:
-                        continue
-
-                    total_attended += attended
-                    total_lectures += total
-
-                    attendance_records.append({
-                        "Subject": subject_name,
-                        "Attended": attended,
-                        "Total": total,
-                        "Attendance": attendance_text,
-                        "Percentage": float(percentage.replace("%", "")),
-                        "Type": attendance_type
-                    })
-                except:
-                    pass
-
-            driver.quit()
-
-            attendance_records.sort(key=lambda x: x["Percentage"])
-
-            current_percentage = (total_attended / total_lectures) * 100 if total_lectures > 0 else 0
-            lectures_to_bunk = calculate_bunk_limit(total_attended, total_lectures) if current_percentage >= 75 else 0
-            lectures_to_attend = calculate_lectures_to_attend(total_attended, total_lectures) if current_percentage < 75 else 0
-
-            return student_name, current_percentage, attendance_records, lectures_to_bunk, lectures_to_attend, total_attended, total_lectures
-        except Exception as e:
-            driver.quit()
-            st.error(f"An error occurred: {str(e)}")
-            return None, 0, [], 0, 0, 0, 0
-
-
-def calculate_bunk_limit(attended, total):
-    lectures_to_bunk = 0
-    while ((attended / (total + lectures_to_bunk)) * 100) >= 75:
-        lectures_to_bunk += 1
-    return lectures_to_bunk - 1
-
-
-def calculate_lectures_to_attend(attended, total):
-    """Calculate how many consecutive lectures need to be attended to reach 75%"""
-    additional_lectures = 0
-    while ((attended + additional_lectures) / (total + additional_lectures)) * 100 < 75:
-        additional_lectures += 1
-    return additional_lectures
-
-
-def generate_chart(subjects, title, colors):
-    if not subjects:
+def summarize_fetch(fetched):
+    """Summarise a fetch result into what the page shows."""
+    student_name, attendance_records, skipped, _, fetched_at = fetched
+
+    unreadable = [skip for skip in skipped if skip.reason != NO_LECTURES]
+    if unreadable:
+        st.warning(f"Could not read {len(unreadable)} subject(s): " + "; ".join(sorted({skip.reason for skip in unreadable})))
+
+    attendance_records = sorted(attendance_records, key=lambda x: x["Percentage"])
+    summary = analytics.summarize(attendance_records, THRESHOLD)
+
+    return student_name, summary["percentage"], attendance_records, summary["can_miss"], summary["to_attend"], summary["attended"], summary["total"], fetched_at
+
+
+def _stored_attendance(username, password):
+    """Return this session's fetched attendance for ``username`` while it is fresh.
+
+    Stale results are refetched when the password is still filled in and
+    dropped otherwise.
+    """
+    stored = st.session_state.get("attendance")
+    if stored is None or stored["username"] != username:
+        return None
+    if time.time() - stored["stored_at"] > config.SESSION_RESULT_TTL:
+        del st.session_state["attendance"]
+        if password:
+            _submit_fetch(username, password, refresh=True)
         return None
+    return stored
 
-    plt.figure(figsize=(10, 6))
-    subjects_names = [sub["Subject"] for sub in subjects]
-    percentages = [sub["Percentage"] for sub in subjects]
 
-    bars = plt.bar(subjects_names, percentages, color=colors)
-    
-    # Add data labels on top of bars
-    for bar in bars:
-        height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2., height + 1,
-                f'{height:.1f}%', ha='center', va='bottom', fontsize=9)
-    
-    # Add a horizontal line at 75%
-    plt.axhline(y=75, color='r', linestyle='--', alpha=0.7, label='Minimum Required (75%)')
-    
-    plt.xlabel("Subjects", fontweight='bold')
-    plt.ylabel("Attendance (%)", fontweight='bold')
-    plt.title(title, fontsize=14, fontweight='bold', pad=20)
-    plt.ylim(0, 105)  # Give some space for data labels
-    plt.xticks(rotation=45, ha='right')
-    plt.legend()
-    plt.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-
-    img_io = io.BytesIO()
-    plt.savefig(img_io, format='png', dpi=100)
-    img_io.seek(0)
-    return base64.b64encode(img_io.read()).decode("utf-8")
-
-
-def generate_pie_chart(attended, total):
-    plt.figure(figsize=(8, 6))
-    labels = ['Attended', 'Missed']
-    sizes = [attended, total - attended]
-    colors = ['#4CAF50', '#f44336']
-    explode = (0.1, 0)  # explode the first slice
-    
-    plt.pie(sizes, explode=explode, labels=labels, colors=colors,
-            autopct='%1.1f%%', shadow=True, startangle=140)
-    plt.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
-    plt.title('Overall Attendance Distribution', fontsize=14, fontweight='bold', pad=20)
-    
-    img_io = io.BytesIO()
-    plt.savefig(img_io, format='png', dpi=100)
-    img_io.seek(0)
-    return base64.b64encode(img_io.read()).decode("utf-8")
+def _submit_fetch(username, password, refresh=False):
+    """Queue a fetch in the background; ``_collect_fetch`` picks up the result."""
+    if "fetch_job" in st.session_state:
+        return
+    try:
+        job = jobs.get_queue().submit(fetch_records, username, password, refresh=refresh)
+    except jobs.Busy as e:
+        st.warning(f"⏳ The server is busy right now. Please retry in {e.retry_after} s.")
+        return
+    st.session_state["fetch_job"] = {"id": job.id, "username": username}
 
 
+def _collect_fetch():
+    """Move a finished fetch into the session, or show how the pending one is going."""
+    pending = st.session_state.get("fetch_job")
+    if pending is None:
+        return None
+    job = jobs.get_queue().get(pending["id"])
+    if job is not None and not job.done:
+        _show_progress()
+        return None
+
+    del st.session_state["fetch_job"]
+    if job is None:
+        st.error("Your fetch expired before it could be shown. Please try again.")
+        return None
+    if job.error is not None:
+        st.error(f"An error occurred: {str(job.error)}")
+    result = summarize_fetch(job.result) if job.error is None else None
+    if not result or not result[2]:
+        st.session_state.pop("attendance", None)
+        st.error("Failed to fetch attendance. Check your credentials and try again.")
+        return None
+    store = history.get_store()
+    last_visit = store.visit(pending["username"], result[-1]) if store is not None else None
+    st.session_state["attendance"] = {"username": pending["username"], "stored_at": time.time(), "result": result,
+                                      "last_visit": last_visit}
+    return st.session_state["attendance"]
+
+
+@st.fragment(run_every=config.JOB_POLL_INTERVAL)
+def _show_progress():
+    # Reruns on its own timer, so no script thread waits on the fetch
+    queue = jobs.get_queue()
+    pending = st.session_state.get("fetch_job")
+    job = queue.get(pending["id"]) if pending else None
+    if job is None or job.done:
+        st.rerun()
+    position = queue.position(job)
+    if position:
+        st.info(f"⏳ You are number {position} in line, about {queue.estimated_wait(job):.0f} s to go.")
+    else:
+        st.info(f"⏳ {job.phase}… ({time.time() - job.started_at:.0f} s)")
+
+
+def _describe_age(seconds):
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return "just now"
+    if minutes < 60:
+        return f"{minutes} min ago"
+    return f"{minutes // 60} h {minutes % 60} min ago"
+
+
+def show_chart(chart, caption=None):
+    if chart is None:
+        return
+    if isinstance(chart, dict):
+        st.vega_lite_chart(chart, use_container_width=True)
+        if caption:
+            st.caption(caption)
+    else:
+        st.image(chart, caption=caption)
+
+
+# Start the shared browsers warming up before the first fetch
+if config.FETCH_BACKEND == "selenium":
+    get_pool()
+metrics.start_http_server()
+
 # Sidebar content
 with st.sidebar:
     st.markdown('<div class="sidebar-content">', unsafe_allow_html=True)
@@ -229,15 +193,18 @@ with st.sidebar:
     st.markdown("### PCCOE Attendance Tracker")
     st.markdown("---")
     
-    st.markdown("""
+    history_note = ("Your attendance counts are also saved on this server as a history for the Trends tab, "
+                    "under a keyed hash of your username, and kept until the host deletes them."
+                    if history.get_store() is not None else "")
+    st.markdown(f"""
     **About this app:**
     
     This tool helps PCET students monitor their attendance across all subjects. It provides insights like:
     
     - Overall attendance percentage
     - Subject-wise attendance breakdown
-    - How many classes you can miss while maintaining 75%
-    - How many classes you need to attend to reach 75%
+    - How many classes you can miss while maintaining {THRESHOLD:g}%
+    - How many classes you need to attend to reach {THRESHOLD:g}%
     
     **How to use:**
     1. Enter your PCET ERP credentials
@@ -246,11 +213,16 @@ with st.sidebar:
     
     **Privacy Note:**
     Your credentials are not stored and are only used to fetch your attendance data.
+    Fetched results are kept in server memory for a short while, under a hashed key.
+    {history_note}
     """)
     
     st.markdown("---")
     
     st.markdown("""**Developed By Vedant Kale ❤️**""")
+
+    cache_stats = cache.results.stats()
+    st.caption(f"Result cache: {cache_stats['hit_rate']:.0%} hit rate · {cache_stats['entries']} cached")
     
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -264,218 +236,285 @@ with col2:
     username = st.text_input("Username")
     password = st.text_input("Password", type="password")
     login_button = st.button("Fetch Attendance", use_container_width=True)
+    refresh_button = "attendance" in st.session_state and st.button("🔄 Refresh", use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
-if login_button:
+# Widget interactions rerun this script; the fetched data lives in session
+# state so they re-render it instead of scraping the ERP again
+if login_button or refresh_button:
     if username and password:
-        student_name, current_percentage, attendance_data, lectures_to_bunk, lectures_to_attend, total_attended, total_lectures = fetch_attendance(username, password)
+        _submit_fetch(username, password, refresh=bool(refresh_button))
+    else:
+        st.warning("Please enter username and password.")
+# While a refresh runs the previous data stays on screen
+stored = _collect_fetch() or _stored_attendance(username, password)
 
-        if attendance_data:
-            # Student information header
-            st.markdown(f'<h2 class="sub-header">Student: {student_name}</h2>', unsafe_allow_html=True)
-            
-            # Summary stats in cards
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.markdown(f'''
-                <div class="stat-card">
-                    <div class="stat-value">{'%.2f' % current_percentage}%</div>
-                    <div class="stat-label">Overall Attendance</div>
-                    <div class="{'success' if current_percentage >= 75 else 'warning'}">
-                        {'✅ Above minimum' if current_percentage >= 75 else '⚠️ Below minimum'}
+if stored is not None:
+    render_started = time.perf_counter()
+    student_name, current_percentage, attendance_data, lectures_to_bunk, lectures_to_attend, total_attended, total_lectures, fetched_at = stored["result"]
+
+    # Student information header
+    st.markdown(f'<h2 class="sub-header">Student: {student_name}</h2>', unsafe_allow_html=True)
+    st.caption(f"Data fetched {_describe_age(time.time() - fetched_at)} · use Refresh for the latest numbers from the ERP")
+    
+    # Summary stats in cards
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.markdown(f'''
+        <div class="stat-card">
+            <div class="stat-value">{'%.2f' % current_percentage}%</div>
+            <div class="stat-label">Overall Attendance</div>
+            <div class="{'success' if current_percentage >= THRESHOLD else 'warning'}">
+                {'✅ Above minimum' if current_percentage >= THRESHOLD else '⚠️ Below minimum'}
+            </div>
+        </div>
+        ''', unsafe_allow_html=True)
+        
+    with col2:
+        st.markdown(f'''
+        <div class="stat-card">
+            <div class="stat-value">{total_attended}/{total_lectures}</div>
+            <div class="stat-label">Classes Attended</div>
+            <div>Out of total lectures</div>
+        </div>
+        ''', unsafe_allow_html=True)
+    
+    with col3:
+        if lectures_to_bunk > 0:
+            st.markdown(f'''
+            <div class="stat-card">
+                <div class="stat-value">{lectures_to_bunk}</div>
+                <div class="stat-label">Classes you can miss</div>
+                <div class="success">While maintaining {THRESHOLD:g}%</div>
+            </div>
+            ''', unsafe_allow_html=True)
+        else:
+            st.markdown(f'''
+            <div class="stat-card">
+                <div class="stat-value">{lectures_to_attend}</div>
+                <div class="stat-label">Classes to attend</div>
+                <div class="warning">To reach {THRESHOLD:g}% minimum</div>
+            </div>
+            ''', unsafe_allow_html=True)
+    
+    with col4:
+        st.markdown(f'''
+        <div class="stat-card">
+            <div class="stat-value">{len(attendance_data)}</div>
+            <div class="stat-label">Total Subjects</div>
+            <div>With attendance tracking</div>
+        </div>
+        ''', unsafe_allow_html=True)
+    
+    df = analytics.add_subject_columns(pd.DataFrame(attendance_data), THRESHOLD)
+
+    # Create tabs for different sections
+    tab1, tab2, tab3, tab4 = st.tabs(["📊 Attendance Details", "📉 Charts & Visualization", "🔍 Analysis", "📈 Trends"])
+    
+    with tab1:
+        # Display the attendance records as a table with styling
+        st.markdown('<h3 class="sub-header">Subject-wise Attendance Records</h3>', unsafe_allow_html=True)
+        
+        # Custom styling for the DataFrame
+        def color_percentage(val):
+            color = 'red' if val < THRESHOLD else 'green'
+            return f'background-color: {color}; color: white'
+        
+        # Apply styling to the percentage column
+        styled_df = df.style.applymap(
+            lambda x: color_percentage(x) if x < THRESHOLD else 'background-color: green; color: white', 
+            subset=['Percentage']
+        )
+        
+        # Add a 'Risk Level' column
+        df['Risk Level'] = df['Percentage'].apply(
+            lambda x: '⚠️ High Risk' if x < 65 else 
+                        ('⚠️ Medium Risk' if x < THRESHOLD else 
+                        '✅ Safe')
+        )
+        
+        # Display the styled DataFrame
+        st.dataframe(
+            df[['Subject', 'Attended', 'Total', 'Percentage', 'Risk Level']],
+            column_config={
+                'Subject': 'Subject Name',
+                'Percentage': st.column_config.ProgressColumn(
+                    'Attendance %',
+                    format='%.1f%%',
+                    min_value=0,
+                    max_value=100,
+                ),
+                'Risk Level': 'Status'
+            },
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        # Download button for attendance data
+        csv = df.to_csv(index=False)
+        st.download_button(
+            label="📥 Download Attendance Data",
+            data=csv,
+            file_name=f"attendance_{student_name}_{datetime.datetime.now().strftime('%Y%m%d')}.csv",
+            mime="text/csv",
+        )
+    
+    with tab2:
+        st.markdown('<h3 class="sub-header">Attendance Visualizations</h3>', unsafe_allow_html=True)
+        
+        # Generate charts
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Overall attendance pie chart
+            show_chart(generate_pie_chart(total_attended, total_lectures), caption="Overall Attendance Distribution")
+        
+        with col2:
+            # Subject with lowest attendance
+            subjects_below = [s for s in attendance_data if s["Percentage"] < THRESHOLD]
+            if subjects_below:
+                st.markdown(f"### Subjects Below {THRESHOLD:g}% ({len(subjects_below)})")
+                for subject in subjects_below:
+                    st.markdown(f"""
+                    <div style="padding: 10px; margin-bottom: 5px; background-color: rgba(255, 0, 0, 0.1); border-left: 5px solid red; border-radius: 5px;">
+                        <b>{subject['Subject']}</b>: {subject['Percentage']:.1f}% ({subject['Attendance']})
                     </div>
-                </div>
-                ''', unsafe_allow_html=True)
-                
-            with col2:
-                st.markdown(f'''
-                <div class="stat-card">
-                    <div class="stat-value">{total_attended}/{total_lectures}</div>
-                    <div class="stat-label">Classes Attended</div>
-                    <div>Out of total lectures</div>
-                </div>
-                ''', unsafe_allow_html=True)
+                    """, unsafe_allow_html=True)
+        
+        # Bar charts
+        st.markdown("### Attendance by Subject")
+        chart_type = st.radio("Choose visualization", ["All Subjects", "Lowest Attendance", "Highest Attendance"])
+        
+        if chart_type == "All Subjects":
+            all_colors = ['green' if s["Percentage"] >= THRESHOLD else 'red' for s in attendance_data]
+            all_chart = generate_chart(attendance_data, "Attendance Percentage for All Subjects", all_colors)
+            show_chart(all_chart)
+        
+        elif chart_type == "Lowest Attendance":
+            low_attendance = attendance_data[:6]  # 6 lowest
+            low_colors = ["red"] * 6
+            low_chart = generate_chart(low_attendance, "Top 6 Lowest Attendance Subjects", low_colors)
+            show_chart(low_chart)
+        
+        else:  # Highest Attendance
+            high_attendance = attendance_data[-6:]  # 6 highest
+            high_colors = ["green"] * 6
+            high_chart = generate_chart(high_attendance, "Top 6 Highest Attendance Subjects", high_colors)
+            show_chart(high_chart)
+    
+    with tab3:
+        st.markdown('<h3 class="sub-header">Attendance Analysis & Recommendations</h3>', unsafe_allow_html=True)
+        
+        # Analysis and recommendations
+        if current_percentage < THRESHOLD:
+            st.warning(f"⚠️ Your current attendance ({current_percentage:.2f}%) is below the required {THRESHOLD:g}%. You need to attend at least {lectures_to_attend} more consecutive classes to reach the minimum requirement.")
             
-            with col3:
-                if lectures_to_bunk > 0:
-                    st.markdown(f'''
-                    <div class="stat-card">
-                        <div class="stat-value">{lectures_to_bunk}</div>
-                        <div class="stat-label">Classes you can miss</div>
-                        <div class="success">While maintaining 75%</div>
+            # Specific recommendations for subjects
+            critical_subjects = df[df["Percentage"] < 65].to_dict("records")
+            if critical_subjects:
+                st.error("#### Critical Subjects")
+                st.markdown("These subjects require immediate attention:")
+                for subject in critical_subjects:
+                    st.markdown(f"""
+                    <div style="padding: 10px; margin-bottom: 5px; background-color: rgba(255, 0, 0, 0.1); border-left: 5px solid red; border-radius: 5px;">
+                        <b>{subject['Subject']}</b>: Currently at {subject['Percentage']:.1f}%<br>
+                        You need to attend {subject['Need to Attend']} more consecutive classes for this subject to reach {THRESHOLD:g}%
                     </div>
-                    ''', unsafe_allow_html=True)
-                else:
-                    st.markdown(f'''
-                    <div class="stat-card">
-                        <div class="stat-value">{lectures_to_attend}</div>
-                        <div class="stat-label">Classes to attend</div>
-                        <div class="warning">To reach 75% minimum</div>
-                    </div>
-                    ''', unsafe_allow_html=True)
-            
-            with col4:
-                st.markdown(f'''
-                <div class="stat-card">
-                    <div class="stat-value">{len(attendance_data)}</div>
-                    <div class="stat-label">Total Subjects</div>
-                    <div>With attendance tracking</div>
-                </div>
-                ''', unsafe_allow_html=True)
-            
-            # Create tabs for different sections
-            tab1, tab2, tab3 = st.tabs(["📊 Attendance Details", "📉 Charts & Visualization", "🔍 Analysis"])
-            
-            with tab1:
-                # Display the attendance records as a table with styling
-                st.markdown('<h3 class="sub-header">Subject-wise Attendance Records</h3>', unsafe_allow_html=True)
-                
-                # Custom styling for the DataFrame
-                def color_percentage(val):
-                    color = 'red' if val < 75 else 'green'
-                    return f'background-color: {color}; color: white'
-                
-                df = pd.DataFrame(attendance_data)
-                
-                # Apply styling to the percentage column
-                styled_df = df.style.applymap(
-                    lambda x: color_percentage(x) if x < 75 else 'background-color: green; color: white', 
-                    subset=['Percentage']
-                )
-                
-                # Add a 'Risk Level' column
-                df['Risk Level'] = df['Percentage'].apply(
-                    lambda x: '⚠️ High Risk' if x < 65 else 
-                                ('⚠️ Medium Risk' if x < 75 else 
-                                '✅ Safe')
-                )
-                
-                # Display the styled DataFrame
-                st.dataframe(
-                    df[['Subject', 'Attended', 'Total', 'Percentage', 'Risk Level']],
-                    column_config={
-                        'Subject': 'Subject Name',
-                        'Percentage': st.column_config.ProgressColumn(
-                            'Attendance %',
-                            format='%.1f%%',
-                            min_value=0,
-                            max_value=100,
-                        ),
-                        'Risk Level': 'Status'
-                    },
-                    use_container_width=True,
-                    hide_index=True
-                )
-                
-                # Download button for attendance data
-                csv = df.to_csv(index=False)
-                st.download_button(
-                    label="📥 Download Attendance Data",
-                    data=csv,
-                    file_name=f"attendance_{student_name}_{datetime.datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv",
-                )
-            
-            with tab2:
-                st.markdown('<h3 class="sub-header">Attendance Visualizations</h3>', unsafe_allow_html=True)
-                
-                # Generate charts
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Overall attendance pie chart
-                    pie_chart = generate_pie_chart(total_attended, total_lectures)
-                    if pie_chart:
-                        st.image(f"data:image/png;base64,{pie_chart}", caption="Overall Attendance Distribution")
-                
-                with col2:
-                    # Subject with lowest attendance
-                    subjects_below = [s for s in attendance_data if s["Percentage"] < 75]
-                    if subjects_below:
-                        st.markdown(f"### Subjects Below 75% ({len(subjects_below)})")
-                        for subject in subjects_below:
-                            st.markdown(f"""
-                            <div style="padding: 10px; margin-bottom: 5px; background-color: rgba(255, 0, 0, 0.1); border-left: 5px solid red; border-radius: 5px;">
-                                <b>{subject['Subject']}</b>: {subject['Percentage']:.1f}% ({subject['Attendance']})
-                            </div>
-                            """, unsafe_allow_html=True)
-                
-                # Bar charts
-                st.markdown("### Attendance by Subject")
-                chart_type = st.radio("Choose visualization", ["All Subjects", "Lowest Attendance", "Highest Attendance"])
-                
-                if chart_type == "All Subjects":
-                    all_colors = ['green' if s["Percentage"] >= 75 else 'red' for s in attendance_data]
-                    all_chart = generate_chart(attendance_data, "Attendance Percentage for All Subjects", all_colors)
-                    if all_chart:
-                        st.image(f"data:image/png;base64,{all_chart}")
-                
-                elif chart_type == "Lowest Attendance":
-                    low_attendance = attendance_data[:6]  # 6 lowest
-                    low_colors = ["red"] * 6
-                    low_chart = generate_chart(low_attendance, "Top 6 Lowest Attendance Subjects", low_colors)
-                    if low_chart:
-                        st.image(f"data:image/png;base64,{low_chart}")
-                
-                else:  # Highest Attendance
-                    high_attendance = attendance_data[-6:]  # 6 highest
-                    high_colors = ["green"] * 6
-                    high_chart = generate_chart(high_attendance, "Top 6 Highest Attendance Subjects", high_colors)
-                    if high_chart:
-                        st.image(f"data:image/png;base64,{high_chart}")
+                    """, unsafe_allow_html=True)
+        else:
+            st.success(f"✅ Your overall attendance ({current_percentage:.2f}%) is above the required {THRESHOLD:g}%. You can miss up to {lectures_to_bunk} classes while maintaining the minimum requirement.")
             
-            with tab3:
-                st.markdown('<h3 class="sub-header">Attendance Analysis & Recommendations</h3>', unsafe_allow_html=True)
-                
-                # Analysis and recommendations
-                if current_percentage < 75:
-                    st.warning(f"⚠️ Your current attendance ({current_percentage:.2f}%) is below the required 75%. You need to attend at least {lectures_to_attend} more consecutive classes to reach the minimum requirement.")
-                    
-                    # Specific recommendations for subjects
-                    critical_subjects = [s for s in attendance_data if s["Percentage"] < 65]
-                    if critical_subjects:
-                        st.error("#### Critical Subjects")
-                        st.markdown("These subjects require immediate attention:")
-                        for subject in critical_subjects:
-                            classes_needed = int((0.75 * subject["Total"] - subject["Attended"]) / 0.25) + 1
-                            st.markdown(f"""
-                            <div style="padding: 10px; margin-bottom: 5px; background-color: rgba(255, 0, 0, 0.1); border-left: 5px solid red; border-radius: 5px;">
-                                <b>{subject['Subject']}</b>: Currently at {subject['Percentage']:.1f}%<br>
-                                You need to attend approximately {classes_needed} more consecutive classes for this subject to reach 75%
-                            </div>
-                            """, unsafe_allow_html=True)
+            # Show which subjects have room for absence
+            safe_subjects = df[df["Percentage"] > 80].sort_values("Percentage", ascending=False).to_dict("records")
+            if safe_subjects:
+                st.markdown("#### Subjects with Safe Attendance")
+                st.markdown("These subjects have sufficient attendance:")
+                for subject in safe_subjects[:15]:  # Show top 15 safe subjects
+                    st.markdown(f"""
+                    <div style="padding: 10px; margin-bottom: 5px; background-color: rgba(0, 255, 0, 0.1); border-left: 5px solid green; border-radius: 5px;">
+                        <b>{subject['Subject']}</b>: Currently at {subject['Percentage']:.1f}%<br>
+                        You can miss {subject['Can Miss']} more classes for this subject while maintaining {THRESHOLD:g}%
+                    </div>
+                    """, unsafe_allow_html=True)
+        
+        # Days off planned against the timetable, so a skipped day counts
+        # against every subject taught that day
+        st.markdown("#### Plan Your Days Off")
+        st.markdown("Enter how many lectures of each subject you have on each weekday to see which days you can skip "
+                    f"while every subject stays at or above {THRESHOLD:g}% by the end of term.")
+        weeks_left = st.number_input("Teaching weeks left this term", min_value=0, max_value=30, value=8)
+        timetable = st.data_editor(
+            pd.DataFrame(0, index=pd.Index(planner.row_labels(attendance_data), name="Subject"),
+                         columns=list(planner.WEEKDAYS[:6])),
+            key="timetable", use_container_width=True,
+            column_config={day: st.column_config.NumberColumn(min_value=0, max_value=8, step=1, required=True)
+                           for day in planner.WEEKDAYS[:6]},
+        )
+        # A cleared cell comes back as NaN; count it as no lectures
+        timetable = timetable.fillna(0).astype(int)
+        if timetable.to_numpy().sum() == 0:
+            st.caption("Your plan appears here once the timetable is filled in.")
+        else:
+            plan = planner.plan_bunks(attendance_data, {day: timetable[day].to_dict() for day in timetable.columns},
+                                      int(weeks_left), THRESHOLD)
+            if plan.at_risk:
+                st.warning(f"Even attending every lecture, these subjects finish below {THRESHOLD:g}%: " + ", ".join(plan.at_risk))
+            if plan.days:
+                st.success("You can take " + ", ".join(f"{count} {day}{'s' if count > 1 else ''}" for day, count in plan.days.items())
+                           + f" off, finishing the term at {plan.overall:.1f}% overall.")
+                dates = planner.skip_dates(plan, datetime.date.today(), int(weeks_left))
+                st.caption("For example: " + ", ".join(date.strftime("%a %d %b") for date in dates))
+            else:
+                st.info("No full days can be skipped without a subject dropping below the minimum.")
+            if plan.lectures:
+                st.markdown("You can also miss single lectures: " + ", ".join(f"{subject} ({count})" for subject, count in plan.lectures.items()))
+            st.dataframe(pd.DataFrame(plan.subjects).rename(columns={"Attended": "Attended at End", "Total": "Total at End", "Percentage": "Final %"}),
+                         use_container_width=True, hide_index=True, column_config={"Final %": st.column_config.NumberColumn(format="%.1f")})
+
+        # General attendance tips
+        st.markdown("#### General Tips for Maintaining Attendance")
+        st.markdown("""
+        - Prioritize attending classes for subjects with lower attendance percentages
+        - Set reminders for classes to avoid missing them
+        - If you must miss a class, try to choose from subjects with higher attendance percentages
+        - Keep track of your attendance regularly using this tool
+        - Remember that medical absences might be considered with proper documentation
+        """)
+
+    with tab4:
+        st.markdown('<h3 class="sub-header">Attendance Over Time</h3>', unsafe_allow_html=True)
+        store = history.get_store()
+        if store is None:
+            st.info("Attendance history is turned off. Set HISTORY_DB and a secret HISTORY_SALT to keep it.")
+        else:
+            last_visit = stored.get("last_visit")
+            if last_visit is None:
+                st.info("This is your first visit. Lectures gained or missed will show here next time.")
+            else:
+                changes = store.changes_since(stored["username"], last_visit)
+                st.markdown(f"#### Since your last visit ({_describe_age(time.time() - last_visit)})")
+                if changes:
+                    st.dataframe(pd.DataFrame(
+                        [(subject, attended, held, held - attended) for subject, attended, held in changes],
+                        columns=["Subject", "Attended", "Held", "Missed"],
+                    ), use_container_width=True, hide_index=True)
                 else:
-                    st.success(f"✅ Your overall attendance ({current_percentage:.2f}%) is above the required 75%. You can miss up to {lectures_to_bunk} classes while maintaining the minimum requirement.")
-                    
-                    # Show which subjects have room for absence
-                    safe_subjects = sorted([s for s in attendance_data if s["Percentage"] > 80], key=lambda x: x["Percentage"], reverse=True)
-                    if safe_subjects:
-                        st.markdown("#### Subjects with Safe Attendance")
-                        st.markdown("These subjects have sufficient attendance:")
-                        for subject in safe_subjects[:15]:  # Show top 15 safe subjects
-                            classes_can_miss = int((subject["Percentage"] - 75) * subject["Total"] / 75)
-                            st.markdown(f"""
-                            <div style="padding: 10px; margin-bottom: 5px; background-color: rgba(0, 255, 0, 0.1); border-left: 5px solid green; border-radius: 5px;">
-                                <b>{subject['Subject']}</b>: Currently at {subject['Percentage']:.1f}%<br>
-                                You can miss approximately {classes_can_miss} more classes for this subject while maintaining 75%
-                            </div>
-                            """, unsafe_allow_html=True)
-                
-                # General attendance tips
-                st.markdown("#### General Tips for Maintaining Attendance")
-                st.markdown("""
-                - Prioritize attending classes for subjects with lower attendance percentages
-                - Set reminders for classes to avoid missing them
-                - If you must miss a class, try to choose from subjects with higher attendance percentages
-                - Keep track of your attendance regularly using this tool
-                - Remember that medical absences might be considered with proper documentation
-                """)
+                    st.markdown("No new lectures recorded since then.")
+
+            trend = pd.DataFrame(store.trend(stored["username"]), columns=["Subject", "Fetched", "Attended", "Total"])
+            if trend.empty or trend.groupby("Subject").size().max() < 2:
+                st.caption("The chart appears once a subject's attendance has changed between fetches.")
+            else:
+                trend["Percentage"] = trend["Attended"] / trend["Total"] * 100
+                trend["Fetched"] = pd.to_datetime(trend["Fetched"], unit="s")
+                by_subject = trend.pivot_table(index="Fetched", columns="Subject", values="Percentage").ffill()
+                # Counts only change on new lectures, so carry them up to this fetch
+                by_subject.loc[pd.to_datetime(fetched_at, unit="s")] = by_subject.iloc[-1]
+                st.line_chart(by_subject.sort_index(), y_label="Attendance (%)")
+
+    metrics.record("render_page", time.perf_counter() - render_started)
 
-        else:
-            st.error("Failed to fetch attendance. Check your credentials and try again.")
-    else:
-        st.warning("Please enter username and password.")
 
 # Footer
 st.markdown("""
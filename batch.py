@@ -0,0 +1,183 @@
+"""Fetch attendance for a whole class from a CSV of credentials.
+
+    python batch.py students.csv -o attendance.csv --workers 4
+
+The CSV needs ``username`` and ``password`` columns. Students are fetched
+concurrently through the shared job queue, so a batch counts against
+``FETCH_WORKERS`` and ``FETCH_QUEUE_SIZE`` like any other fetch, and
+logins are spaced out by the per-ERP rate limit. Rows are appended to the
+output as each student finishes, and failures go to a separate error
+report instead of stopping the batch.
+"""
+import argparse
+import csv
+import io
+import logging
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+
+import config
+import jobs
+from scraper import fetch_records
+
+logger = logging.getLogger(__name__)
+
+StudentResult = namedtuple("StudentResult", ["username", "student_name", "records", "error", "seconds"])
+
+COLUMNS = ["Username", "Student", "Subject", "Attended", "Total", "Attendance", "Percentage", "Type"]
+
+
+def read_credentials(source):
+    """Read ``(username, password)`` pairs from a CSV path, file or text."""
+    if isinstance(source, str) and "\n" not in source:
+        with open(source, newline="", encoding="utf-8-sig") as f:
+            return read_credentials(f.read())
+    if isinstance(source, bytes):
+        source = source.decode("utf-8-sig")
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    reader = csv.DictReader(source)
+    fields = {name.strip().lower(): name for name in reader.fieldnames or []}
+    if "username" not in fields or "password" not in fields:
+        raise ValueError("Credentials CSV needs 'username' and 'password' columns")
+    return [
+        (row[fields["username"]].strip(), row[fields["password"]])
+        for row in reader
+        if row[fields["username"]] and row[fields["username"]].strip()
+    ]
+
+
+def fetch_batch(credentials, workers=None, backend=None):
+    """Fetch every student, yielding a StudentResult as each one finishes.
+
+    Students go through the shared job queue, at most ``workers`` at a time,
+    so a class takes turns with single fetches instead of filling the queue.
+    When the queue is full the batch waits for its own fetches, or for the
+    queue's retry estimate, and submits again.
+    """
+    workers = workers or config.BATCH_WORKERS
+    queue = jobs.get_queue()
+    pending = deque(credentials)
+    running = []
+    while pending or running:
+        while pending and len(running) < workers:
+            username, password = pending[0]
+            try:
+                running.append(queue.submit(_fetch_one, username, password, backend))
+            except jobs.Busy as e:
+                if not running:
+                    time.sleep(e.retry_after)
+                    continue
+                break
+            pending.popleft()
+        running[0].wait(config.JOB_POLL_INTERVAL)
+        for job in [job for job in running if job.done]:
+            running.remove(job)
+            yield job.result
+
+
+def _fetch_one(username, password, backend):
+    start = time.perf_counter()
+    try:
+        result = fetch_records(username, password, backend=backend)
+    except Exception as e:
+        logger.warning("Fetch failed for %s: %s", username, e)
+        return StudentResult(username, None, [], str(e) or type(e).__name__, time.perf_counter() - start)
+    return StudentResult(username, result.student_name, result.records, None, time.perf_counter() - start)
+
+
+def dedicate_workers(workers):
+    """Give every batch worker a queue slot and its own browser.
+
+    For command-line runs, where the process does nothing but the batch;
+    call it before the first fetch creates the queue and the pool.
+    """
+    config.FETCH_WORKERS = max(config.FETCH_WORKERS, workers)
+    config.DRIVER_POOL_SIZE = max(config.DRIVER_POOL_SIZE, workers)
+
+
+class BatchRun:
+    """A batch fetching on a background thread, for pages that poll it."""
+
+    def __init__(self, credentials, workers=None, backend=None):
+        self.total = len(credentials)
+        self.results = []
+        self.error = None
+        self.done = False
+        threading.Thread(target=self._run, args=(credentials, workers, backend), name="batch-run", daemon=True).start()
+
+    def _run(self, credentials, workers, backend):
+        try:
+            for result in fetch_batch(credentials, workers, backend):
+                self.results.append(result)
+        except Exception as e:
+            logger.exception("Batch fetch failed")
+            self.error = e
+        finally:
+            self.done = True
+
+
+def result_rows(result):
+    """Flatten one student's records into rows with the COLUMNS keys."""
+    return [dict(record, Username=result.username, Student=result.student_name) for record in result.records]
+
+
+def error_row(result):
+    return {"Username": result.username, "Error": result.error, "Seconds": round(result.seconds, 2)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch attendance for every student in a credentials CSV.")
+    parser.add_argument("credentials", help="CSV file with username and password columns")
+    parser.add_argument("-o", "--output", default="attendance.csv", help="combined CSV to write (default: %(default)s)")
+    parser.add_argument("--parquet", help="also write the combined table to this Parquet file")
+    parser.add_argument("--errors", help="error report CSV (default: <output>.errors.csv)")
+    parser.add_argument("-w", "--workers", type=int, default=config.BATCH_WORKERS, help="concurrent fetches")
+    parser.add_argument("--backend", choices=["selenium", "api"], help="override FETCH_BACKEND")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    credentials = read_credentials(args.credentials)
+    dedicate_workers(args.workers)
+    errors_path = args.errors or args.output.rsplit(".", 1)[0] + ".errors.csv"
+
+    all_rows = []
+    errors = []
+    with open(args.output, "w", newline="", encoding="utf-8") as out:
+        writer = csv.DictWriter(out, fieldnames=COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for done, result in enumerate(fetch_batch(credentials, args.workers, args.backend), 1):
+            if result.error:
+                errors.append(error_row(result))
+                status = f"failed: {result.error}"
+            else:
+                rows = result_rows(result)
+                writer.writerows(rows)
+                out.flush()
+                all_rows.extend(rows)
+                status = f"{len(rows)} subjects"
+            print(f"[{done}/{len(credentials)}] {result.username}: {status} ({result.seconds:.1f}s)", file=sys.stderr)
+
+    with open(errors_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["Username", "Error", "Seconds"])
+        writer.writeheader()
+        writer.writerows(errors)
+
+    parquet_written = False
+    if args.parquet:
+        import pandas as pd
+        try:
+            pd.DataFrame(all_rows, columns=COLUMNS).to_parquet(args.parquet, index=False)
+            parquet_written = True
+        except ImportError:
+            print(f"Could not write {args.parquet}: install pyarrow to write Parquet files", file=sys.stderr)
+
+    print(f"{len(credentials) - len(errors)} fetched, {len(errors)} failed; wrote {args.output}"
+          + (f" and {args.parquet}" if parquet_written else "") + f", errors in {errors_path}", file=sys.stderr)
+    return 1 if errors or (args.parquet and not parquet_written) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
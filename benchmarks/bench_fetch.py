@@ -0,0 +1,209 @@
+"""End-to-end fetch benchmark against the local ERP replica.
+
+    python benchmarks/bench_fetch.py --backend selenium --subjects 15 --users 4
+    python benchmarks/bench_fetch.py --compare benchmarks/results/<earlier>.json
+
+Starts ``erp_stub`` on localhost, points the app at it and measures:
+
+- cold: the first fetch in a fresh process (driver start, first connection)
+- warm: p50/p95 of sequential fetches once everything is running
+- concurrent: throughput and p50/p95 latency with ``--users`` at once
+- peak RSS of this process plus any browsers it started
+- bytes transferred per browser fetch, to compare ``--profile`` settings
+
+Every fetch uses a new username so neither the result cache nor a saved
+ERP session can short-circuit it. Results are written as JSON under
+``benchmarks/results/`` named after the current commit, and ``--compare``
+prints the change against an earlier run.
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import config  # noqa: E402
+import erp_stub  # noqa: E402
+import metrics  # noqa: E402
+from scraper import fetch_records  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# Metrics where a larger number is better; everything else is a cost
+HIGHER_IS_BETTER = {"throughput_per_s"}
+
+
+class PeakRss:
+    """Track the peak resident memory of this process and its children."""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, tree_rss_mb(os.getpid()))
+            self._stop.wait(self.interval)
+
+
+def tree_rss_mb(root_pid):
+    """Resident memory of ``root_pid`` and its descendants, from /proc (Linux)."""
+    if not os.path.isdir("/proc"):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = {}
+    rss = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        pid = int(entry)
+        children.setdefault(int(fields[1]), []).append(pid)
+        rss[pid] = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total / (1024 * 1024)
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args):
+    server = erp_stub.serve(subjects=erp_stub.make_subjects(args.subjects), delay=args.delay,
+                            render_delay=args.render_delay)
+    config.ERP_BASE_URL = f"http://127.0.0.1:{server.server_port}"
+    config.DRIVER_POOL_SIZE = max(config.DRIVER_POOL_SIZE, args.users)
+    config.BROWSER_PROFILE = args.profile
+    # Needed for the bytes_transferred counter
+    config.METRICS_ENABLED = True
+    usernames = (f"bench{i}" for i in count())
+    errors = []
+
+    def timed_fetch(username):
+        start = time.perf_counter()
+        try:
+            fetch_records(username, erp_stub.PASSWORD, backend=args.backend, refresh=True)
+        except Exception as e:
+            errors.append(f"{username}: {e}")
+        return time.perf_counter() - start
+
+    with PeakRss() as memory:
+        cold = timed_fetch(next(usernames))
+        warm = [timed_fetch(next(usernames)) for _ in range(args.warm)]
+
+        with ThreadPoolExecutor(max_workers=args.users) as executor:
+            names = [next(usernames) for _ in range(args.users * args.rounds)]
+            start = time.perf_counter()
+            concurrent = list(executor.map(timed_fetch, names))
+            elapsed = time.perf_counter() - start
+    server.shutdown()
+    fetches = 1 + len(warm) + len(concurrent)
+    transferred = metrics.snapshot()["counters"].get("bytes_transferred")
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "params": {
+            "backend": args.backend, "subjects": args.subjects, "delay": args.delay,
+            "render_delay": args.render_delay, "warm": args.warm, "users": args.users, "rounds": args.rounds,
+            "extraction_mode": config.EXTRACTION_MODE, "profile": args.profile,
+        },
+        "results": {
+            "cold_s": cold,
+            "warm_p50_s": statistics.median(warm) if warm else None,
+            "warm_p95_s": percentile(warm, 0.95),
+            "concurrent_p50_s": statistics.median(concurrent),
+            "concurrent_p95_s": percentile(concurrent, 0.95),
+            "throughput_per_s": len(concurrent) / elapsed,
+            "peak_rss_mb": memory.peak_mb,
+            "kb_per_fetch": transferred / fetches / 1024 if transferred is not None else None,
+            "errors": len(errors),
+        },
+        "error_samples": errors[:5],
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Print each metric against ``baseline``; return True if any regressed."""
+    regressed = False
+    print(f"{'metric':<20}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, value in current["results"].items():
+        before = baseline["results"].get(name)
+        if value is None or not before:
+            print(f"{name:<20}{before!s:>12}{value!s:>12}")
+            continue
+        change = (value - before) / before
+        worse = change < -tolerance if name in HIGHER_IS_BETTER else change > tolerance
+        regressed |= worse and name != "errors"
+        print(f"{name:<20}{before:>12.3f}{value:>12.3f}{change:>+10.1%}{'  <-- regression' if worse else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["selenium", "api"], default=config.FETCH_BACKEND)
+    parser.add_argument("--profile", choices=["standard", "lean"], default=config.BROWSER_PROFILE,
+                        help="browser profile for the selenium backend")
+    parser.add_argument("--subjects", type=int, default=15)
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds the replica adds to each response")
+    parser.add_argument("--render-delay", type=float, default=0.3, help="seconds before the cards are drawn")
+    parser.add_argument("--warm", type=int, default=10, help="sequential warm fetches")
+    parser.add_argument("--users", type=int, default=4, help="concurrent users")
+    parser.add_argument("--rounds", type=int, default=3, help="fetches per concurrent user")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative change counted as a regression")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>-<backend>[-lean].json)")
+    args = parser.parse_args()
+
+    result = run(args)
+    suffix = "-lean" if args.backend == "selenium" and args.profile == "lean" else ""
+    output = args.output or os.path.join(RESULTS_DIR, f"{result['commit']}-{args.backend}{suffix}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print(json.dumps(result["results"], indent=2))
+    print(f"Saved to {output}")
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(result, json.load(f), args.tolerance):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""In-memory caches shared by every session in the Streamlit process.
+
+``results`` holds parsed attendance so a refresh within the TTL does not
+touch the ERP at all. ``sessions`` holds ERP cookies and tokens so a result
+cache miss can skip the login form.
+
+Entries are keyed by a salted hash of the username, never the raw
+credentials. Each entry also stores a salted hash of the username and
+password, and is only returned to a caller presenting the same pair.
+"""
+import hashlib
+import hmac
+import os
+import pickle
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import config
+
+_SALT = os.environ.get("CACHE_SALT", "").encode() or secrets.token_bytes(32)
+
+
+def user_key(username):
+    return hmac.new(_SALT, username.strip().lower().encode(), hashlib.sha256).hexdigest()
+
+
+def credential_check(username, password):
+    return hmac.new(_SALT, f"{username.strip().lower()}\0{password}".encode(), hashlib.sha256).digest()
+
+
+class TTLCache:
+    """A thread-safe LRU cache whose entries expire after ``ttl`` seconds.
+
+    The least recently used entries are evicted once there are more than
+    ``max_entries`` of them or their pickled size exceeds ``max_bytes``.
+    """
+
+    def __init__(self, ttl, max_entries, max_bytes):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, check):
+        """Return ``(value, stored_at)`` or None if missing, expired or not ours."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[1] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None or not hmac.compare_digest(entry[2], check):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key, check, value):
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.time(), check, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def discard(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        self._bytes -= self._entries.pop(key)[3]
+
+
+results = TTLCache(config.RESULT_CACHE_TTL, config.RESULT_CACHE_MAX_ENTRIES, config.RESULT_CACHE_MAX_BYTES)
+sessions = TTLCache(config.ERP_SESSION_TTL, config.RESULT_CACHE_MAX_ENTRIES, config.RESULT_CACHE_MAX_BYTES)
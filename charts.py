@@ -0,0 +1,150 @@
+"""Attendance charts, rendered once per distinct input and cached.
+
+Charts are drawn on standalone ``Figure`` objects rather than through
+pyplot, so nothing is registered in pyplot's global figure list and every
+figure is released as soon as it has been saved.
+
+``CHART_FORMAT`` picks the output: "png" or "svg" image bytes, or "native"
+for a Vega-Lite spec that Streamlit draws in the browser.
+"""
+import io
+from functools import lru_cache
+
+from matplotlib.figure import Figure
+
+import config
+import metrics
+
+PIE_COLORS = ('#4CAF50', '#f44336')
+
+
+def generate_chart(subjects, title, colors, fmt=None, threshold=None):
+    """Bar chart of subject percentages, or None if there are no subjects."""
+    if not subjects:
+        return None
+    fmt = fmt or config.CHART_FORMAT
+    threshold = config.ATTENDANCE_THRESHOLD if threshold is None else threshold
+    names = tuple(sub["Subject"] for sub in subjects)
+    percentages = tuple(sub["Percentage"] for sub in subjects)
+    if fmt == "native":
+        return _bar_spec(names, percentages, title, tuple(colors), threshold)
+    with metrics.phase("chart_bar"):
+        return _render_bar(names, percentages, title, tuple(colors), threshold, fmt)
+
+
+def generate_pie_chart(attended, total, fmt=None):
+    """Pie chart of attended against missed lectures."""
+    fmt = fmt or config.CHART_FORMAT
+    if fmt == "native":
+        return _pie_spec(attended, total)
+    with metrics.phase("chart_pie"):
+        return _render_pie(attended, total, fmt)
+
+
+@lru_cache(maxsize=config.CHART_CACHE_SIZE)
+def _render_bar(names, percentages, title, colors, threshold, fmt):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    bars = ax.bar(names, percentages, color=colors)
+
+    # Add data labels on top of bars
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 1,
+                f'{height:.1f}%', ha='center', va='bottom', fontsize=9)
+
+    # Add a horizontal line at the required minimum
+    ax.axhline(y=threshold, color='r', linestyle='--', alpha=0.7, label=f'Minimum Required ({threshold:g}%)')
+
+    ax.set_xlabel("Subjects", fontweight='bold')
+    ax.set_ylabel("Attendance (%)", fontweight='bold')
+    ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
+    ax.set_ylim(0, 105)  # Give some space for data labels
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    ax.legend()
+    ax.grid(axis='y', alpha=0.3)
+    fig.tight_layout()
+    return _save(fig, fmt)
+
+
+@lru_cache(maxsize=config.CHART_CACHE_SIZE)
+def _render_pie(attended, total, fmt):
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    ax.pie([attended, total - attended], explode=(0.1, 0), labels=['Attended', 'Missed'], colors=PIE_COLORS,
+           autopct='%1.1f%%', shadow=True, startangle=140)
+    ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
+    ax.set_title('Overall Attendance Distribution', fontsize=14, fontweight='bold', pad=20)
+    return _save(fig, fmt)
+
+
+def _save(fig, fmt):
+    buffer = io.BytesIO()
+    try:
+        with metrics.phase("chart_save"):
+            fig.savefig(buffer, format=fmt, dpi=config.CHART_DPI)
+    finally:
+        fig.clear()
+    data = buffer.getvalue()
+    return data.decode("utf-8") if fmt == "svg" else data
+
+
+def _bar_spec(names, percentages, title, colors, threshold):
+    values = [
+        {"Subject": name, "Percentage": pct, "Color": colors[i % len(colors)] if colors else "steelblue"}
+        for i, (name, pct) in enumerate(zip(names, percentages))
+    ]
+    x = {"field": "Subject", "type": "nominal", "sort": None, "axis": {"labelAngle": -45}}
+    return {
+        "title": title,
+        "height": 400,
+        "layer": [
+            {
+                "data": {"values": values},
+                "mark": "bar",
+                "encoding": {
+                    "x": x,
+                    "y": {"field": "Percentage", "type": "quantitative", "scale": {"domain": [0, 105]},
+                          "title": "Attendance (%)"},
+                    "color": {"field": "Color", "type": "nominal", "scale": None},
+                    "tooltip": [{"field": "Subject"}, {"field": "Percentage", "format": ".1f"}],
+                },
+            },
+            {
+                "data": {"values": values},
+                "mark": {"type": "text", "dy": -8, "fontSize": 11},
+                "encoding": {
+                    "x": x,
+                    "y": {"field": "Percentage", "type": "quantitative"},
+                    "text": {"field": "Percentage", "type": "quantitative", "format": ".1f"},
+                },
+            },
+            {
+                "data": {"values": [{"threshold": threshold}]},
+                "mark": {"type": "rule", "color": "red", "strokeDash": [6, 4]},
+                "encoding": {"y": {"field": "threshold", "type": "quantitative"}},
+            },
+        ],
+    }
+
+
+def _pie_spec(attended, total):
+    return {
+        "title": "Overall Attendance Distribution",
+        "data": {"values": [
+            {"Status": "Attended", "Lectures": attended},
+            {"Status": "Missed", "Lectures": total - attended},
+        ]},
+        "mark": {"type": "arc", "tooltip": True},
+        "encoding": {
+            "theta": {"field": "Lectures", "type": "quantitative"},
+            "color": {"field": "Status", "type": "nominal",
+                      "scale": {"domain": ["Attended", "Missed"], "range": list(PIE_COLORS)}},
+        },
+    }
+
+
+def cache_info():
+    return {"bar": _render_bar.cache_info(), "pie": _render_pie.cache_info()}
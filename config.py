@@ -0,0 +1,153 @@
+"""Runtime settings for the attendance tracker.
+
+Every value can be overridden with an environment variable of the same name,
+so a deployment can be tuned without editing the code.
+"""
+import os
+
+
+def _int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _float(name, default):
+    return float(os.environ.get(name, default))
+
+
+def _bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes")
+
+
+# Number of headless Chrome instances kept warm for fetches
+DRIVER_POOL_SIZE = _int("DRIVER_POOL_SIZE", 2)
+
+# Recycle a browser after this many leases to keep its memory in check
+DRIVER_MAX_USES = _int("DRIVER_MAX_USES", 25)
+
+# Seconds a fetch waits for a free browser before giving up
+DRIVER_LEASE_TIMEOUT = _float("DRIVER_LEASE_TIMEOUT", 60)
+
+# Seconds to wait for each stage of the ERP pages before giving up
+LOGIN_FORM_TIMEOUT = _float("LOGIN_FORM_TIMEOUT", 15)
+LOGIN_TIMEOUT = _float("LOGIN_TIMEOUT", 15)
+ATTENDANCE_TIMEOUT = _float("ATTENDANCE_TIMEOUT", 20)
+
+# Seconds between checks while waiting on the ERP pages
+WAIT_POLL_INTERVAL = _float("WAIT_POLL_INTERVAL", 0.1)
+
+# How subject cards are read: "html" (parse page_source), "script" (one
+# execute_script call) or "elements"
+EXTRACTION_MODE = os.environ.get("EXTRACTION_MODE", "html")
+
+# Where the ERP lives; point this at erp_stub.py to work offline
+ERP_BASE_URL = os.environ.get("ERP_BASE_URL", "https://learner.pceterp.in").rstrip("/")
+
+# "selenium" drives a browser; "api" calls the ERP's JSON endpoints directly
+# and falls back to the browser if they cannot be used
+FETCH_BACKEND = os.environ.get("FETCH_BACKEND", "selenium")
+
+# JSON endpoints used by the API backend
+ERP_API_LOGIN_PATH = os.environ.get("ERP_API_LOGIN_PATH", "/api/login")
+ERP_API_ATTENDANCE_PATH = os.environ.get("ERP_API_ATTENDANCE_PATH", "/api/attendance")
+
+# Seconds before an ERP API request is abandoned
+API_TIMEOUT = _float("API_TIMEOUT", 10)
+
+# Connections kept open to the ERP API
+API_POOL_SIZE = _int("API_POOL_SIZE", 10)
+
+# Seconds a fetched result is reused across reruns of the same browser tab
+SESSION_RESULT_TTL = _float("SESSION_RESULT_TTL", 900)
+
+# Seconds parsed attendance is served from the shared cache, and its limits
+RESULT_CACHE_TTL = _float("RESULT_CACHE_TTL", 1800)
+RESULT_CACHE_MAX_ENTRIES = _int("RESULT_CACHE_MAX_ENTRIES", 5000)
+RESULT_CACHE_MAX_BYTES = _int("RESULT_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+
+# Seconds ERP cookies and tokens are reused to skip the login form
+ERP_SESSION_TTL = _float("ERP_SESSION_TTL", 1800)
+
+# Minimum attendance percentage students have to maintain
+ATTENDANCE_THRESHOLD = _float("ATTENDANCE_THRESHOLD", 75)
+
+# Chart output: "png" or "svg" images, or "native" charts drawn by the browser
+CHART_FORMAT = os.environ.get("CHART_FORMAT", "png")
+CHART_DPI = _int("CHART_DPI", 100)
+
+# Rendered charts kept in memory, per chart kind
+CHART_CACHE_SIZE = _int("CHART_CACHE_SIZE", 256)
+
+# Concurrent fetches when fetching a whole class
+BATCH_WORKERS = _int("BATCH_WORKERS", 4)
+
+# ERP logins allowed per second, and how many may burst at once
+ERP_LOGIN_RATE = _float("ERP_LOGIN_RATE", 2)
+ERP_LOGIN_BURST = _int("ERP_LOGIN_BURST", 4)
+
+# ERP page loads and API calls allowed per second, and their burst
+ERP_REQUEST_RATE = _float("ERP_REQUEST_RATE", 10)
+ERP_REQUEST_BURST = _int("ERP_REQUEST_BURST", 20)
+
+# Seconds a fetch waits on the rate limit before giving up
+ERP_THROTTLE_TIMEOUT = _float("ERP_THROTTLE_TIMEOUT", 30)
+
+# Retries for dropped connections, 5xx/429 answers and crashed browsers,
+# with jittered exponential backoff between them
+ERP_RETRIES = _int("ERP_RETRIES", 2)
+RETRY_BASE_DELAY = _float("RETRY_BASE_DELAY", 0.5)
+RETRY_MAX_DELAY = _float("RETRY_MAX_DELAY", 8)
+
+# Record per-phase timings and counters; off by default
+METRICS_ENABLED = _bool("METRICS_ENABLED", False)
+
+# Also log each phase as a JSON line
+METRICS_LOG = _bool("METRICS_LOG", False)
+
+# Port for the Prometheus /metrics endpoint; 0 disables it
+METRICS_PORT = _int("METRICS_PORT", 0)
+
+# Address the /metrics endpoint listens on; it has no authentication, so
+# only widen this behind a firewall or proxy
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+
+# Recent samples kept per phase for percentiles
+METRICS_WINDOW = _int("METRICS_WINDOW", 500)
+
+# Chrome profile: "standard", or "lean" to skip images, fonts, stylesheets
+# and media, load pages eagerly and cap renderer memory
+BROWSER_PROFILE = os.environ.get("BROWSER_PROFILE", "standard")
+
+# V8 heap cap for the lean profile's renderer, in MB
+BROWSER_JS_HEAP_MB = _int("BROWSER_JS_HEAP_MB", 256)
+
+# chromedriver to use instead of searching PATH and the driver caches
+CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH", "")
+
+# Chrome executable to start and to check the driver version against
+CHROME_BINARY = os.environ.get("CHROME_BINARY", "")
+
+# Never download a chromedriver; fail if no local one matches Chrome
+DRIVER_OFFLINE = _bool("DRIVER_OFFLINE", False)
+
+# SQLite file for attendance history; empty disables it
+HISTORY_DB = os.environ.get("HISTORY_DB", "attendance_history.db")
+
+# Secret key for the student hashes in the history; keep it fixed across
+# restarts. Roll numbers are easy to enumerate, so history stays off until
+# this is set.
+HISTORY_SALT = os.environ.get("HISTORY_SALT", "")
+
+# Fetches run at once in the background, and how many may wait behind them
+# before new ones are turned away with a retry estimate
+FETCH_WORKERS = _int("FETCH_WORKERS", 4)
+FETCH_QUEUE_SIZE = _int("FETCH_QUEUE_SIZE", 20)
+
+# Seconds between progress checks while a fetch is queued or running
+JOB_POLL_INTERVAL = _float("JOB_POLL_INTERVAL", 0.5)
+
+# Seconds a finished fetch waits to be collected by its session
+JOB_RESULT_TTL = _float("JOB_RESULT_TTL", 300)
+
+# Address for api_server.py, the JSON API
+API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+API_PORT = _int("API_PORT", 8080)
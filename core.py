@@ -0,0 +1,113 @@
+"""Fetch attendance and the bunk/attend numbers without any UI.
+
+    python core.py fetch <username>            # prompts for the password
+    python core.py batch students.csv > attendance.ndjson
+
+Importing this module loads only the standard library and ``config``. The
+fetch backends, Selenium and NumPy are imported on first use, and nothing
+here touches Streamlit, matplotlib or pandas, so bots, dashboards and
+``api_server.py`` start in a fraction of the app's time and memory.
+
+``fetch`` returns a plain dict that serialises straight to JSON, with the
+same records and numbers the app shows; ``fetch_many`` yields one such
+dict per student as each finishes.
+"""
+import argparse
+import datetime
+import getpass
+import json
+import sys
+
+import config
+
+
+def fetch(username, password, backend=None, refresh=False, threshold=None):
+    """Fetch one student and return their attendance report."""
+    from scraper import fetch_records
+
+    return report(fetch_records(username, password, backend=backend, refresh=refresh), threshold)
+
+
+def fetch_many(credentials, workers=None, backend=None, threshold=None):
+    """Yield a report, or ``{"username", "error"}``, for each student as they finish."""
+    from batch import fetch_batch
+
+    for result in fetch_batch(credentials, workers, backend):
+        if result.error:
+            yield {"username": result.username, "error": result.error}
+        else:
+            yield dict(report_records(result.student_name, result.records, threshold), username=result.username)
+
+
+def report(fetched, threshold=None):
+    """JSON-ready report for a scraper.FetchResult."""
+    return dict(
+        report_records(fetched.student_name, fetched.records, threshold),
+        backend=fetched.backend,
+        fetched_at=datetime.datetime.fromtimestamp(fetched.fetched_at, datetime.timezone.utc).isoformat(),
+        skipped=[{"index": skip.index, "reason": skip.reason} for skip in fetched.skipped],
+    )
+
+
+def report_records(student_name, records, threshold=None):
+    import analytics
+
+    threshold = config.ATTENDANCE_THRESHOLD if threshold is None else threshold
+    records = sorted(records, key=lambda record: record["Percentage"])
+    return {
+        "student_name": student_name,
+        "threshold": threshold,
+        "summary": analytics.summarize(records, threshold),
+        "subjects": [
+            dict(record,
+                 **{"Can Miss": analytics.bunk_limit(record["Attended"], record["Total"], threshold),
+                    "Need to Attend": analytics.lectures_to_attend(record["Attended"], record["Total"], threshold)})
+            for record in records
+        ],
+    }
+
+
+def _percentage(value):
+    threshold = float(value)
+    if not 0 < threshold < 100:
+        raise argparse.ArgumentTypeError(f"must be between 0 and 100, got {value}")
+    return threshold
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["selenium", "api"], help="override FETCH_BACKEND")
+    parser.add_argument("--threshold", type=_percentage, help="override ATTENDANCE_THRESHOLD")
+    commands = parser.add_subparsers(dest="command", required=True)
+    one = commands.add_parser("fetch", help="print one student's report as JSON")
+    one.add_argument("username")
+    one.add_argument("--password-stdin", action="store_true", help="read the password from stdin")
+    one.add_argument("--refresh", action="store_true", help="skip the result cache")
+    many = commands.add_parser("batch", help="print a report per student from a credentials CSV as NDJSON")
+    many.add_argument("credentials", help="CSV file with username and password columns")
+    many.add_argument("-w", "--workers", type=int, default=config.BATCH_WORKERS, help="concurrent fetches")
+    args = parser.parse_args(argv)
+
+    if args.command == "fetch":
+        password = sys.stdin.readline().rstrip("\n") if args.password_stdin else getpass.getpass()
+        try:
+            result = fetch(args.username, password, args.backend, args.refresh, args.threshold)
+        except Exception as e:
+            print(json.dumps({"username": args.username, "error": str(e) or type(e).__name__}))
+            return 1
+        print(json.dumps(result, indent=2))
+        return 0
+
+    from batch import dedicate_workers, read_credentials
+
+    credentials = read_credentials(args.credentials)
+    dedicate_workers(args.workers)
+    failed = 0
+    for line in fetch_many(credentials, args.workers, args.backend, args.threshold):
+        failed += "error" in line
+        print(json.dumps(line), flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
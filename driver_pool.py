@@ -0,0 +1,263 @@
+"""A bounded pool of warm headless Chrome drivers.
+
+Starting Chrome is the slowest and most memory hungry part of a fetch, so the
+app keeps a few browsers running and lends them out one fetch at a time.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+
+import config
+import driver_resolver
+import jobs
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# Extra switches for the "lean" profile: skip Chrome features a scrape
+# never uses and keep the renderer's heap small
+LEAN_ARGUMENTS = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-features=Translate,OptimizationHints,MediaRouter,AutofillServerCommunication",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--renderer-process-limit=1",
+]
+
+# Requests the "lean" profile refuses; only the DOM text is ever read
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.css",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg",
+]
+
+
+def build_chrome_options(profile=None):
+    profile = profile or config.BROWSER_PROFILE
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    if config.CHROME_BINARY:
+        options.binary_location = config.CHROME_BINARY
+    if profile == "lean":
+        options.page_load_strategy = "eager"
+        for argument in LEAN_ARGUMENTS:
+            options.add_argument(argument)
+        options.add_argument(f"--js-flags=--max-old-space-size={config.BROWSER_JS_HEAP_MB}")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+        })
+    elif profile != "standard":
+        raise ValueError(f"Unknown browser profile: {profile}")
+    return options
+
+
+def start_driver(profile=None):
+    profile = profile or config.BROWSER_PROFILE
+    service = driver_resolver.service()
+    jobs.progress("Starting a browser")
+    with metrics.phase("chrome_start"):
+        driver = webdriver.Chrome(service=service, options=build_chrome_options(profile))
+    if profile == "lean":
+        # Preferences do not cover fonts, stylesheets or media everywhere, so
+        # also refuse them at the network layer
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    return driver
+
+
+class PoolTimeout(Exception):
+    """Raised when no browser becomes free within the lease timeout."""
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+
+
+class DriverPool:
+    def __init__(self, size=None, max_uses=None, lease_timeout=None, factory=start_driver):
+        self.size = size or config.DRIVER_POOL_SIZE
+        self.max_uses = max_uses or config.DRIVER_MAX_USES
+        self.lease_timeout = lease_timeout or config.DRIVER_LEASE_TIMEOUT
+        self._factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._live = set()
+        self._starting = 0
+        # Bumped whenever a browser is returned, started, fails to start or
+        # is thrown away, so leases waiting in _checkout look again
+        self._generation = 0
+        self._changed = threading.Condition(self._lock)
+        self._closed = False
+
+    def warm(self):
+        """Start browsers in the background until the pool is full."""
+        def fill():
+            while not self._closed:
+                try:
+                    pooled = self._start()
+                except Exception:
+                    logger.exception("Could not start a browser while warming the pool")
+                    break
+                if pooled is None:
+                    break
+                self._put_idle(pooled)
+
+        threading.Thread(target=fill, name="driver-pool-warmup", daemon=True).start()
+
+    @contextmanager
+    def lease(self):
+        """Lend out a clean driver, returning it to the pool afterwards.
+
+        A driver is thrown away instead of returned if the caller raised, if
+        it fails to reset, or once it has been used ``max_uses`` times.
+        """
+        if self._closed:
+            raise RuntimeError("Driver pool is closed")
+        with metrics.phase("driver_wait"):
+            if not self._slots.acquire(timeout=self.lease_timeout):
+                raise PoolTimeout("All browsers are busy, please try again in a moment")
+        pooled = None
+        try:
+            pooled = self._checkout()
+            pooled.uses += 1
+            yield pooled.driver
+        except BaseException:
+            if pooled is not None:
+                self._discard(pooled)
+            raise
+        else:
+            self._checkin(pooled)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            live, self._live = self._live, set()
+        for pooled in live:
+            _quit(pooled.driver)
+
+    def _start(self):
+        """Start a new browser, or return None if the pool is already full."""
+        with self._lock:
+            if self._starting + len(self._live) >= self.size:
+                return None
+            self._starting += 1
+        pooled = None
+        try:
+            pooled = _PooledDriver(self._factory())
+        finally:
+            with self._lock:
+                self._starting -= 1
+                if pooled is not None:
+                    self._live.add(pooled)
+                self._notify()
+        return pooled
+
+    def _checkout(self):
+        deadline = time.monotonic() + self.lease_timeout
+        while True:
+            with self._lock:
+                generation = self._generation
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                pooled = self._start()
+                if pooled is None:
+                    # Another start is in flight. Wait for it to finish and
+                    # look again: take its browser if it worked, or start
+                    # one here (and see the real error) if it failed.
+                    with self._changed:
+                        changed = self._changed.wait_for(lambda: self._generation != generation,
+                                                         timeout=deadline - time.monotonic())
+                    if not changed:
+                        raise PoolTimeout("Timed out waiting for a browser to start")
+                    continue
+            if _is_alive(pooled.driver):
+                return pooled
+            self._discard(pooled)
+
+    def _checkin(self, pooled):
+        if self._closed or pooled.uses >= self.max_uses or not _reset(pooled.driver):
+            self._discard(pooled)
+        else:
+            self._put_idle(pooled)
+
+    def _put_idle(self, pooled):
+        self._idle.put(pooled)
+        with self._lock:
+            self._notify()
+
+    def _discard(self, pooled):
+        with self._lock:
+            self._live.discard(pooled)
+            self._notify()
+        _quit(pooled.driver)
+
+    def _notify(self):
+        # Callers hold self._lock
+        self._generation += 1
+        self._changed.notify_all()
+
+
+def _reset(driver):
+    # Storage is per origin, so clear it before leaving the page we were on
+    try:
+        driver.delete_all_cookies()
+        driver.execute_script(
+            "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+        )
+        driver.get("about:blank")
+        return True
+    except Exception:
+        return False
+
+
+def _is_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def _quit(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide pool, starting it on first use."""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = DriverPool()
+            _shared_pool.warm()
+            atexit.register(_shared_pool.close)
+        return _shared_pool
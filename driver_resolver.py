@@ -0,0 +1,145 @@
+"""Find a chromedriver that matches the installed Chrome, once per process.
+
+Candidates are tried in order: ``CHROMEDRIVER_PATH``, ``chromedriver`` on
+the PATH, drivers already in Selenium Manager's cache, drivers already in
+webdriver-manager's cache, and only then a webdriver-manager download. The
+first one whose major version matches Chrome's is remembered, so a fetch
+never resolves a driver and a host with a usable local driver never touches
+the network. ``DRIVER_OFFLINE`` rules out the download altogether.
+"""
+import glob
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+
+from selenium.webdriver.chrome.service import Service as ChromeService
+
+import config
+import metrics
+
+logger = logging.getLogger(__name__)
+
+CHROME_NAMES = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"]
+DRIVER_NAME = "chromedriver.exe" if sys.platform == "win32" else "chromedriver"
+
+_VERSION = re.compile(r"(\d+)\.(\d+)\.(\d+)\.(\d+)")
+_lock = threading.Lock()
+_resolved = None
+
+
+class DriverNotFound(Exception):
+    """Raised when no chromedriver matching the installed Chrome can be found."""
+
+
+def service():
+    """Return a new ``Service`` for the resolved driver.
+
+    Each browser needs its own ``Service`` because it owns the driver
+    process, but the path behind it is only looked up once.
+    """
+    return ChromeService(executable_path=driver_path())
+
+
+def driver_path():
+    """Path of a chromedriver matching Chrome, resolved on the first call."""
+    global _resolved
+    with _lock:
+        if _resolved is None:
+            with metrics.phase("driver_install"):
+                _resolved = _resolve()
+        return _resolved
+
+
+def chrome_binary():
+    if config.CHROME_BINARY:
+        return config.CHROME_BINARY
+    for name in CHROME_NAMES:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def version_of(binary):
+    """The (major, minor, build, patch) reported by ``binary --version``, or None."""
+    try:
+        output = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = _VERSION.search(output)
+    return tuple(int(part) for part in match.groups()) if match else None
+
+
+def _resolve():
+    browser = chrome_binary()
+    chrome_version = version_of(browser) if browser else None
+    if chrome_version is None:
+        logger.warning("Could not determine the Chrome version; driver versions will not be checked")
+
+    for source, path in _local_candidates():
+        driver_version = version_of(path)
+        if driver_version is None:
+            logger.info("Skipping %s chromedriver at %s: it did not report a version", source, path)
+        elif chrome_version and driver_version[0] != chrome_version[0]:
+            logger.info("Skipping %s chromedriver %s at %s: Chrome is %s",
+                        source, driver_version[0], path, chrome_version[0])
+        else:
+            logger.info("Using %s chromedriver at %s", source, path)
+            return path
+
+    if config.DRIVER_OFFLINE:
+        raise DriverNotFound(
+            f"No local chromedriver matches Chrome {chrome_version[0] if chrome_version else '(unknown)'}; "
+            "set CHROMEDRIVER_PATH or allow downloads by unsetting DRIVER_OFFLINE"
+        )
+    return _download()
+
+
+def _local_candidates():
+    if config.CHROMEDRIVER_PATH:
+        yield "configured", config.CHROMEDRIVER_PATH
+    path = shutil.which(DRIVER_NAME)
+    if path:
+        yield "PATH", path
+    for path in _cached(_selenium_cache()):
+        yield "Selenium Manager", path
+    for path in _cached(_wdm_cache()):
+        yield "webdriver-manager", path
+
+
+def _selenium_cache():
+    root = os.environ.get("SE_CACHE_PATH") or os.path.join(os.path.expanduser("~"), ".cache", "selenium")
+    return os.path.join(root, "chromedriver")
+
+
+def _wdm_cache():
+    root = os.getcwd() if os.environ.get("WDM_LOCAL") == "1" else os.path.expanduser("~")
+    return os.path.join(root, ".wdm", "drivers", "chromedriver")
+
+
+def _cached(root):
+    """Executable drivers under ``root``, newest version first."""
+    paths = [
+        path for path in glob.glob(os.path.join(root, "**", DRIVER_NAME), recursive=True)
+        if os.path.isfile(path) and os.access(path, os.X_OK)
+    ]
+
+    def version(path):
+        match = _VERSION.search(path)
+        return tuple(int(part) for part in match.groups()) if match else ()
+
+    return sorted(paths, key=version, reverse=True)
+
+
+def _download():
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    logger.info("No local chromedriver found, downloading one with webdriver-manager")
+    try:
+        return ChromeDriverManager().install()
+    except Exception as e:
+        raise DriverNotFound(f"Could not download chromedriver: {e}") from e
@@ -0,0 +1,160 @@
+"""Fetch attendance straight from the ERP's JSON API, without a browser.
+
+The learner portal is a Vue SPA that loads its data over XHR. This backend
+makes the same two calls, sign in and load attendance, over pooled HTTP
+connections. Endpoint paths are configurable because the ERP does not
+document them; ``erp_stub.py`` serves the shape this module expects.
+"""
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+import jobs
+import metrics
+import ratelimit
+from erp_parser import parse_blocks
+
+
+class ErpApiError(Exception):
+    """The API could not be used; the caller may fall back to the browser."""
+
+
+class InvalidCredentials(ErpApiError):
+    """The ERP rejected the username or password."""
+
+
+# Answers worth retrying: rate limited or the ERP briefly unavailable
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# One adapter shared by every fetch so TCP/TLS connections are reused, while
+# each fetch gets its own Session and therefore its own cookies
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.API_POOL_SIZE)
+
+
+def new_session():
+    session = requests.Session()
+    session.mount("https://", _adapter)
+    session.mount("http://", _adapter)
+    session.headers["Accept"] = "application/json"
+    return session
+
+
+def login(session, username, password, base_url=None):
+    """Sign in and return the response body, adding the token to the session."""
+    base_url = base_url or config.ERP_BASE_URL
+    response = _request(session, "POST", base_url, config.ERP_API_LOGIN_PATH, "login",
+                        json={"username": username, "password": password})
+    # A 400 more likely means the guessed endpoint wants another payload
+    # shape; _json raises a plain ErpApiError for it so the browser is tried
+    if response.status_code in (401, 403):
+        raise InvalidCredentials("Invalid username or password")
+    body = _json(response)
+    token = _find(body, ("token", "access_token", "accessToken"))
+    if token:
+        session.headers["Authorization"] = f"Bearer {token}"
+    elif not session.cookies:
+        raise ErpApiError("Login response had neither a token nor a session cookie")
+    return body
+
+
+def get_attendance(session, base_url=None):
+    base_url = base_url or config.ERP_BASE_URL
+    response = _request(session, "GET", base_url, config.ERP_API_ATTENDANCE_PATH, "request")
+    if response.status_code in (401, 403):
+        raise ErpApiError("ERP session is not authorised")
+    return _json(response)
+
+
+def fetch(username, password, base_url=None, erp_session=None):
+    """Return ``(student_name, records, skipped, erp_session)``.
+
+    ``erp_session`` from an earlier fetch is tried first so the login call
+    can be skipped; if the ERP no longer accepts it we sign in again.
+    """
+    with new_session() as session:
+        body = login_body = None
+        if erp_session:
+            session.headers.update(erp_session["headers"])
+            session.cookies.update(erp_session["cookies"])
+            try:
+                with metrics.phase("api_attendance"):
+                    body = get_attendance(session, base_url)
+            except ErpApiError:
+                session.headers.pop("Authorization", None)
+                session.cookies.clear()
+        if body is None:
+            jobs.progress("Logging in")
+            with metrics.phase("api_login"):
+                login_body = login(session, username, password, base_url)
+            jobs.progress("Downloading attendance")
+            with metrics.phase("api_attendance"):
+                body = get_attendance(session, base_url)
+        erp_session = {
+            "headers": {k: v for k, v in session.headers.items() if k == "Authorization"},
+            "cookies": session.cookies.get_dict(),
+        }
+
+    student_name = _find(body, ("student_name", "studentName", "name")) \
+        or _find(login_body, ("student_name", "studentName", "name")) or "Unknown"
+    subjects = body if isinstance(body, list) else _find(body, ("subjects", "attendance", "data"))
+    if not isinstance(subjects, list):
+        raise ErpApiError("Attendance response did not contain a subject list")
+
+    records, skipped = parse_blocks([_to_block(subject) for subject in subjects])
+    return student_name, records, skipped, erp_session
+
+
+def _to_block(subject):
+    """Map one API subject onto the card text the browser scrape reads."""
+    attended = _find(subject, ("attended", "present", "presentCount"))
+    total = _find(subject, ("total", "conducted", "totalCount"))
+    percentage = _find(subject, ("percentage", "percent"))
+    if attended is None or total is None:
+        return {"error": "missing attended/total counts"}
+    if percentage is None:
+        percentage = attended / total * 100 if total else 0
+    return {
+        "subject": _find(subject, ("subject", "subject_name", "subjectName", "name")),
+        "attendance": f"{attended} / {total}",
+        "percentage": str(percentage),
+        "type": _find(subject, ("type", "attendance_type", "attendanceType")),
+    }
+
+
+def _find(body, keys):
+    """Return the first of ``keys`` present in ``body`` or its ``data`` member."""
+    if not isinstance(body, dict):
+        return None
+    for key in keys:
+        if body.get(key) is not None:
+            return body[key]
+    if isinstance(body.get("data"), dict):
+        return _find(body["data"], keys)
+    return None
+
+
+def _request(session, method, base_url, path, kind, **kwargs):
+    """Send a request under the ``kind`` rate limit, retrying transient failures."""
+    for attempt in range(config.ERP_RETRIES + 1):
+        ratelimit.throttle(kind, base_url)
+        try:
+            response = session.request(method, base_url + path, timeout=config.API_TIMEOUT, **kwargs)
+        except requests.RequestException as e:
+            if attempt == config.ERP_RETRIES:
+                raise ErpApiError(f"Could not reach the ERP API: {e}") from e
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == config.ERP_RETRIES:
+                return response
+        metrics.count("erp_retries")
+        time.sleep(ratelimit.backoff(attempt))
+
+
+def _json(response):
+    if response.status_code >= 400:
+        raise ErpApiError(f"ERP API returned HTTP {response.status_code}")
+    try:
+        return response.json()
+    except ValueError as e:
+        raise ErpApiError("ERP API did not return JSON") from e
@@ -0,0 +1,196 @@
+"""Parse the ERP attendance page from its HTML, without a browser.
+
+``parse_html`` takes ``driver.page_source`` or a saved page and reads it
+with lxml and precompiled XPath, so a live scrape needs a single round trip
+and saved pages can be parsed in bulk for regression checks and profiling:
+
+    python erp_parser.py saved_pages/ --repeat 100
+
+Cards whose shown percentage disagrees with Attended/Total are reported as
+mismatches.
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+
+import lxml.html
+from lxml import etree
+
+STUDENT_NAME_XPATH = "//span[contains(@class, 'ml-3 font-weight-bold text-medium-emphasis')]"
+SUBJECT_BLOCK_XPATH = "//div[contains(@class, 'v-col-sm-4')]"
+SUBJECT_NAME_XPATH = ".//div[@class='pb-5']"
+ATTENDANCE_XPATH = ".//span[contains(text(), '/')]"
+PERCENTAGE_XPATH = ".//div[@class='v-progress-circular__content']"
+TYPE_XPATH = ".//div[@class='v-chip__content']"
+
+ATTENDANCE_PATTERN = re.compile(r'(\d+) / (\d+)')
+
+NO_LECTURES = "no lectures recorded"
+
+# Percentage points a card may differ from Attended/Total; the ERP rounds
+MISMATCH_TOLERANCE = 0.5
+
+# Elements that start a new line in the browser's innerText
+BLOCK_TAGS = {"div", "p", "br", "li", "tr", "header", "section", "h1", "h2", "h3", "h4", "h5", "h6"}
+
+_FIELDS = {
+    "subject": etree.XPath(SUBJECT_NAME_XPATH),
+    "attendance": etree.XPath(ATTENDANCE_XPATH),
+    "percentage": etree.XPath(PERCENTAGE_XPATH),
+    "type": etree.XPath(TYPE_XPATH),
+}
+_STUDENT_NAME = etree.XPath(STUDENT_NAME_XPATH)
+_SUBJECT_BLOCKS = etree.XPath(SUBJECT_BLOCK_XPATH)
+
+Skipped = namedtuple("Skipped", ["index", "reason"])
+Mismatch = namedtuple("Mismatch", ["subject", "percentage", "computed"])
+Page = namedtuple("Page", ["student_name", "records", "skipped", "mismatches"])
+
+
+def parse_html(html):
+    """Parse an attendance page given as ``str`` or ``bytes``."""
+    root = lxml.html.document_fromstring(html)
+    names = _STUDENT_NAME(root)
+    student_name = inner_text(names[0]) if names else None
+    blocks = []
+    for element in _SUBJECT_BLOCKS(root):
+        block = {}
+        for key, xpath in _FIELDS.items():
+            found = xpath(element)
+            block[key] = inner_text(found[0]) if found else None
+        blocks.append(block)
+    records, skipped = parse_blocks(blocks)
+    return Page(student_name.strip() if student_name else "Unknown", records, skipped, check_percentages(records))
+
+
+def parse_file(path):
+    with open(path, "rb") as f:
+        return parse_html(f.read())
+
+
+def parse_directory(directory, pattern="*.html"):
+    """Yield ``(path, Page)`` for every saved page in ``directory``, in name order."""
+    for path in sorted(glob.glob(os.path.join(directory, pattern))):
+        yield path, parse_file(path)
+
+
+def parse_blocks(blocks):
+    """Turn raw card text into attendance records.
+
+    Each block is a dict of the text found for ``subject``, ``attendance``,
+    ``percentage`` and ``type``, with ``None`` for anything missing. Returns
+    the records and a list of the blocks that were skipped and why.
+    """
+    records = []
+    skipped = []
+    for index, block in enumerate(blocks):
+        if block.get("error"):
+            skipped.append(Skipped(index, block["error"]))
+            continue
+        missing = [key for key in ("subject", "attendance", "percentage") if block.get(key) is None]
+        if missing:
+            skipped.append(Skipped(index, f"missing {', '.join(missing)}"))
+            continue
+
+        attendance_text = block["attendance"].strip()
+        match = ATTENDANCE_PATTERN.search(attendance_text)
+        if match:
+            attended, total = map(int, match.groups())
+        else:
+            attended, total = 0, 0
+
+        if total == 0:
+            skipped.append(Skipped(index, NO_LECTURES))
+            continue
+
+        try:
+            percentage = float(block["percentage"].strip().replace("%", ""))
+        except ValueError:
+            skipped.append(Skipped(index, f"unreadable percentage {block['percentage']!r}"))
+            continue
+
+        type_words = (block.get("type") or "").split()
+        records.append({
+            "Subject": block["subject"].split("\n")[-1],
+            "Attended": attended,
+            "Total": total,
+            "Attendance": attendance_text,
+            "Percentage": percentage,
+            "Type": type_words[0] if type_words else "Unknown"
+        })
+    return records, skipped
+
+
+def check_percentages(records, tolerance=MISMATCH_TOLERANCE):
+    """Records whose Percentage is more than ``tolerance`` away from Attended/Total."""
+    mismatches = []
+    for record in records:
+        computed = record["Attended"] / record["Total"] * 100
+        if abs(record["Percentage"] - computed) > tolerance:
+            mismatches.append(Mismatch(record["Subject"], record["Percentage"], round(computed, 2)))
+    return mismatches
+
+
+def inner_text(element):
+    """Approximate the browser's ``innerText``: one line per block element."""
+    parts = []
+    _collect_text(element, parts)
+    lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _collect_text(element, parts):
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        if not isinstance(child.tag, str):
+            pass  # comments only contribute their tail
+        elif child.tag in BLOCK_TAGS:
+            parts.append("\n")
+            _collect_text(child, parts)
+            parts.append("\n")
+        elif child.tag not in ("script", "style"):
+            _collect_text(child, parts)
+        if child.tail:
+            parts.append(child.tail)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="folder of saved attendance pages")
+    parser.add_argument("--pattern", default="*.html")
+    parser.add_argument("--repeat", type=int, default=1, help="parse every page this many times and report timing")
+    args = parser.parse_args()
+
+    flagged = 0
+    for path, page in parse_directory(args.directory, args.pattern):
+        print(f"{os.path.basename(path)}: {page.student_name}, {len(page.records)} subjects, "
+              f"{len(page.skipped)} skipped")
+        for mismatch in page.mismatches:
+            flagged += 1
+            print(f"  mismatch in {mismatch.subject}: shows {mismatch.percentage}%, "
+                  f"Attended/Total gives {mismatch.computed}%")
+
+    if args.repeat > 1:
+        # Read the files up front so only parsing is timed
+        sources = []
+        for path in sorted(glob.glob(os.path.join(args.directory, args.pattern))):
+            with open(path, "rb") as f:
+                sources.append(f.read())
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for source in sources:
+                parse_html(source)
+        elapsed = time.perf_counter() - start
+        if sources:
+            print(f"Parsed {len(sources)} pages {args.repeat} times: "
+                  f"{elapsed / (len(sources) * args.repeat) * 1000:.3f} ms per page")
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""A local replica of the ERP: its login and attendance pages and JSON API.
+
+Run it and point the app at it to work entirely offline:
+
+    python erp_stub.py --port 8765 --subjects 15 --delay 0.2
+    ERP_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+
+The pages reproduce the Vuetify markup the browser scrape reads
+(``v-col-sm-4`` cards with ``pb-5``, ``v-progress-circular__content`` and
+``v-chip__content``), and the API serves the shape ``erp_api`` expects, so
+both backends can be exercised. ``--delay`` holds every response back and
+``--render-delay`` makes the attendance page draw its cards from script
+after a pause, like the real SPA.
+
+Any non-empty username is accepted with the password ``password``.
+"""
+import argparse
+import html
+import json
+import random
+import secrets
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+STUDENT_NAME = "Test Student"
+PASSWORD = "password"
+SESSION_COOKIE = "erp_session"
+
+# Stand-ins for the SPA's static bundle, so a browser downloads roughly what
+# it would from the real ERP; sizes in KB
+ASSETS = {
+    "/assets/vuetify.css": ("text/css", 350),
+    "/assets/materialdesignicons.woff2": ("font/woff2", 400),
+    "/assets/logo.png": ("image/png", 60),
+    "/assets/background.jpg": ("image/jpeg", 250),
+}
+
+ASSET_TAGS = """<link rel="stylesheet" href="/assets/vuetify.css">"""
+ASSET_BODY = """<img src="/assets/logo.png" alt="PCET" height="48"><div style="background-image: url(/assets/background.jpg)"></div>"""
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>PCET Learner</title>""" + ASSET_TAGS + """</head>
+<body>
+<div class="v-application">
+  """ + ASSET_BODY.replace("%", "%%") + """
+  <form class="v-form" onsubmit="return false">
+    <div class="v-input"><input type="text" name="username" autocomplete="username"></div>
+    <div class="v-input"><input type="password" name="password" autocomplete="current-password"></div>
+    <button type="button" class="v-btn v-btn--block bg-primary" onclick="signIn()"><span class="v-btn__content">Sign In</span></button>
+    <div class="v-messages" id="error"></div>
+  </form>
+</div>
+<script>
+function signIn() {
+  var inputs = document.querySelectorAll("input");
+  fetch(%(login_path)s, {
+    method: "POST",
+    headers: {"Content-Type": "application/json"},
+    body: JSON.stringify({username: inputs[0].value, password: inputs[1].value})
+  }).then(function (response) {
+    if (!response.ok) { document.getElementById("error").innerText = "Invalid credentials"; return; }
+    return response.json().then(function (body) {
+      window.localStorage.setItem("authToken", body.token);
+      window.location.href = "/dashboard";
+    });
+  });
+}
+</script>
+</body></html>
+"""
+
+ATTENDANCE_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Attendance | PCET Learner</title>""" + ASSET_TAGS + """</head>
+<body>
+<div class="v-application">
+  """ + ASSET_BODY.replace("%", "%%") + """
+  <header class="v-toolbar"><span class="ml-3 font-weight-bold text-medium-emphasis">%(student_name)s</span></header>
+  <div class="v-container"><div class="v-row" id="subjects">%(cards)s</div></div>
+</div>
+%(script)s
+</body></html>
+"""
+
+CARD = """
+<div class="v-col-sm-4 v-col-md-3 v-col-12">
+  <div class="v-card v-card--variant-elevated">
+    <div class="pb-5"><div class="text-caption">%(code)s</div><div class="text-subtitle-1">%(subject)s</div></div>
+    <div class="d-flex align-center">
+      <div class="v-progress-circular"><div class="v-progress-circular__content">%(percentage)s%%</div></div>
+      <span class="ml-4">%(attended)d / %(total)d</span>
+    </div>
+    <span class="v-chip v-chip--size-small"><div class="v-chip__content">%(type)s Lecture</div></span>
+  </div>
+</div>"""
+
+DEFERRED_RENDER = """<script>
+var cards = %(cards)s;
+setTimeout(function () { document.getElementById("subjects").innerHTML = cards; }, %(delay_ms)d);
+</script>"""
+
+
+def make_subjects(count=8, seed=0):
+    rng = random.Random(seed)
+    subjects = []
+    for i in range(count):
+        total = rng.randint(10, 60)
+        attended = rng.randint(total // 2, total)
+        subjects.append({
+            "subject": f"Subject {i + 1}",
+            "attended": attended,
+            "total": total,
+            "percentage": round(attended / total * 100, 2),
+            "type": "Theory" if i % 2 == 0 else "Practical",
+        })
+    return subjects
+
+
+def asset_body(path, size_kb):
+    """Filler content of ``size_kb`` for a static asset."""
+    if path.endswith(".css"):
+        head = b"@font-face { font-family: mdi; src: url(/assets/materialdesignicons.woff2); }\n" \
+               b"body { font-family: mdi, sans-serif; }\n"
+        return head + b"/*" + b"x" * (size_kb * 1024 - len(head) - 4) + b"*/"
+    return b"\0" * (size_kb * 1024)
+
+
+EMPTY_STATE = """<div class="v-empty-state"><div class="v-empty-state__title">No attendance recorded yet</div></div>"""
+
+
+def render_cards(subjects):
+    if not subjects:
+        return EMPTY_STATE
+    return "".join(
+        CARD % dict(subject, code=f"SUB{i + 1:03d}", subject=html.escape(subject["subject"]))
+        for i, subject in enumerate(subjects)
+    )
+
+
+def render_attendance_page(subjects, student_name=STUDENT_NAME, render_delay=0):
+    cards = render_cards(subjects)
+    if render_delay:
+        script = DEFERRED_RENDER % {"cards": json.dumps(cards), "delay_ms": render_delay * 1000}
+        cards = ""
+    else:
+        script = ""
+    return ATTENDANCE_PAGE % {"student_name": html.escape(student_name), "cards": cards, "script": script}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "ErpStub/1.0"
+
+    def do_POST(self):
+        self._delay()
+        if self.path != config.ERP_API_LOGIN_PATH:
+            return self._send_json(404, {"message": "Not found"})
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_json(400, {"message": "Malformed JSON"})
+        if not body.get("username") or body.get("password") != PASSWORD:
+            return self._send_json(401, {"message": "Invalid credentials"})
+        token = secrets.token_hex(16)
+        self.server.tokens.add(token)
+        self._send_json(200, {"token": token, "name": STUDENT_NAME},
+                        {"Set-Cookie": f"{SESSION_COOKIE}={token}; Path=/; HttpOnly"})
+
+    def do_GET(self):
+        self._delay()
+        path = self.path.split("?", 1)[0]
+        if path == config.ERP_API_ATTENDANCE_PATH:
+            if not self._authorised():
+                return self._send_json(401, {"message": "Unauthorised"})
+            return self._send_json(200, {"student_name": STUDENT_NAME, "subjects": self.server.subjects})
+        if path in ASSETS:
+            content_type, size_kb = ASSETS[path]
+            return self._send(200, asset_body(path, size_kb), content_type)
+        if path == "/attendance" and self._authorised():
+            page = render_attendance_page(self.server.subjects, render_delay=self.server.render_delay)
+            return self._send(200, page.encode(), "text/html; charset=utf-8")
+        if path in ("/", "/login", "/dashboard", "/attendance"):
+            # Signed-out visitors get the login form on every page, like the SPA
+            if path == "/dashboard" and self._authorised():
+                page = ATTENDANCE_PAGE % {"student_name": STUDENT_NAME, "cards": "", "script": ""}
+            else:
+                page = LOGIN_PAGE % {"login_path": json.dumps(config.ERP_API_LOGIN_PATH)}
+            return self._send(200, page.encode(), "text/html; charset=utf-8")
+        self._send_json(404, {"message": "Not found"})
+
+    def _authorised(self):
+        token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+        if token in self.server.tokens:
+            return True
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        return SESSION_COOKIE in cookie and cookie[SESSION_COOKIE].value in self.server.tokens
+
+    def _delay(self):
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+    def _send_json(self, status, body, headers=None):
+        self._send(status, json.dumps(body).encode(), "application/json", headers)
+
+    def _send(self, status, payload, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=0, subjects=None, delay=0, render_delay=0):
+    """Start the replica in a background thread and return the server.
+
+    The server's base URL is ``f"http://127.0.0.1:{server.server_port}"``;
+    call ``server.shutdown()`` to stop it. ``delay`` is added to every
+    response and ``render_delay`` (seconds) defers drawing the cards.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.tokens = set()
+    server.subjects = make_subjects() if subjects is None else subjects
+    server.delay = delay
+    server.render_delay = render_delay
+    threading.Thread(target=server.serve_forever, name="erp-stub", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--subjects", type=int, default=8, help="number of subjects to serve")
+    parser.add_argument("--delay", type=float, default=0, help="seconds added to every response")
+    parser.add_argument("--render-delay", type=float, default=0,
+                        help="seconds before the attendance page draws its cards")
+    args = parser.parse_args()
+
+    server = serve(args.port, make_subjects(args.subjects), args.delay, args.render_delay)
+    print(f"ERP replica listening on http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Read the student name and subject cards off the attendance page.
+
+The default "html" mode fetches ``page_source`` once and parses it with
+``erp_parser``. "script" collects every card in one ``execute_script`` call,
+and "elements" keeps the original per-element lookups as a last resort.
+"""
+import logging
+from collections import namedtuple
+
+from selenium.webdriver.common.by import By
+
+import config
+import erp_parser
+import metrics
+from erp_parser import (ATTENDANCE_XPATH, NO_LECTURES, PERCENTAGE_XPATH, STUDENT_NAME_XPATH, SUBJECT_BLOCK_XPATH,
+                        SUBJECT_NAME_XPATH, TYPE_XPATH, parse_blocks)
+
+logger = logging.getLogger(__name__)
+
+# Same XPaths as the element path, evaluated inside the page in one go
+EXTRACT_SCRIPT = """
+var xpaths = arguments[0];
+function first(xpath, context) {
+    return document.evaluate(xpath, context, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+function text(xpath, context) {
+    var node = first(xpath, context);
+    return node === null ? null : node.innerText;
+}
+var blocks = document.evaluate(xpaths.block, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var result = {student_name: text(xpaths.student_name, document), blocks: []};
+for (var i = 0; i < blocks.snapshotLength; i++) {
+    var block = blocks.snapshotItem(i);
+    result.blocks.push({
+        subject: text(xpaths.subject, block),
+        attendance: text(xpaths.attendance, block),
+        percentage: text(xpaths.percentage, block),
+        type: text(xpaths.type, block)
+    });
+}
+return result;
+"""
+
+_SCRIPT_XPATHS = {
+    "student_name": STUDENT_NAME_XPATH,
+    "block": SUBJECT_BLOCK_XPATH,
+    "subject": SUBJECT_NAME_XPATH,
+    "attendance": ATTENDANCE_XPATH,
+    "percentage": PERCENTAGE_XPATH,
+    "type": TYPE_XPATH,
+}
+
+Extraction = namedtuple("Extraction", ["student_name", "records", "skipped"])
+
+
+def extract_attendance(driver, mode=None):
+    """Return the student name, parsed records and skipped cards for the current page."""
+    mode = mode or config.EXTRACTION_MODE
+    if mode == "html":
+        try:
+            page = erp_parser.parse_html(driver.page_source)
+        except Exception as e:
+            logger.warning("HTML extraction failed, falling back to script: %s", e)
+            mode = "script"
+        else:
+            _report(page.mismatches)
+            return _log_skipped(Extraction(page.student_name, page.records, page.skipped))
+    if mode == "script":
+        try:
+            raw = driver.execute_script(EXTRACT_SCRIPT, _SCRIPT_XPATHS)
+        except Exception as e:
+            logger.warning("Script extraction failed, falling back to elements: %s", e)
+        else:
+            return _build(raw["student_name"], raw["blocks"])
+    elif mode != "elements":
+        raise ValueError(f"Unknown extraction mode: {mode}")
+    return _build(*_read_elements(driver))
+
+
+def _build(student_name, blocks):
+    records, skipped = parse_blocks(blocks)
+    _report(erp_parser.check_percentages(records))
+    student_name = student_name.strip() if student_name else "Unknown"
+    return _log_skipped(Extraction(student_name, records, skipped))
+
+
+def _log_skipped(extraction):
+    for skip in extraction.skipped:
+        if skip.reason != NO_LECTURES:
+            logger.warning("Skipped subject block %d: %s", skip.index, skip.reason)
+    return extraction
+
+
+def _report(mismatches):
+    for mismatch in mismatches:
+        logger.warning("%s shows %s%% but Attended/Total gives %s%%",
+                       mismatch.subject, mismatch.percentage, mismatch.computed)
+    metrics.count("percentage_mismatches", len(mismatches))
+
+
+def _read_elements(driver):
+    try:
+        student_name = driver.find_element(By.XPATH, STUDENT_NAME_XPATH).text
+    except Exception as e:
+        logger.warning("Error fetching student name: %s", e)
+        student_name = None
+
+    blocks = []
+    for element in driver.find_elements(By.XPATH, SUBJECT_BLOCK_XPATH):
+        try:
+            block = {
+                "subject": element.find_element(By.XPATH, SUBJECT_NAME_XPATH).text,
+                "attendance": element.find_element(By.XPATH, ATTENDANCE_XPATH).text,
+                "percentage": element.find_element(By.XPATH, PERCENTAGE_XPATH).text,
+            }
+        except Exception as e:
+            blocks.append({"error": f"{type(e).__name__} reading card"})
+            continue
+        try:
+            block["type"] = element.find_element(By.XPATH, TYPE_XPATH).text
+        except Exception:
+            block["type"] = None
+        blocks.append(block)
+    return student_name, blocks
@@ -0,0 +1,176 @@
+"""Attendance history kept in a local SQLite database.
+
+Every fetch from the ERP is recorded, but a subject only gets a new row when
+its attended or total count has changed since its last row, so the table
+grows with lectures rather than with page views. A subject is its name and
+type, since a theory and a practical often share a name. Rows are
+clustered by student, subject and fetch time, which keeps one student's
+trend a single index range scan however many students are stored.
+
+Students are identified by a keyed hash of the username (``HISTORY_SALT``).
+It has to stay the same across restarts, unlike the per-process salt used
+for the in-memory caches, and it has to be secret: usernames are roll
+numbers that are easy to enumerate, so without a key the hashes could be
+reversed. History stays off until a salt is set.
+"""
+import hashlib
+import sqlite3
+import threading
+
+import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    student BLOB NOT NULL,
+    subject TEXT NOT NULL,
+    type TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    attended INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (student, subject, type, fetched_at)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS latest (
+    student BLOB NOT NULL,
+    subject TEXT NOT NULL,
+    type TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    attended INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (student, subject, type)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS visits (
+    student BLOB PRIMARY KEY,
+    visited_at REAL NOT NULL
+) WITHOUT ROWID;
+
+PRAGMA user_version = 1;
+"""
+
+# Version 0 keyed subjects by name alone; its rows are kept with an
+# unknown type
+MIGRATE_V0 = """
+ALTER TABLE snapshots RENAME TO snapshots_v0;
+ALTER TABLE latest RENAME TO latest_v0;
+""" + SCHEMA + """
+INSERT INTO snapshots SELECT student, subject, 'Unknown', fetched_at, attended, total FROM snapshots_v0;
+INSERT INTO latest SELECT student, subject, 'Unknown', fetched_at, attended, total FROM latest_v0;
+DROP TABLE snapshots_v0;
+DROP TABLE latest_v0;
+"""
+
+
+def student_key(username):
+    key = config.HISTORY_SALT.encode()
+    return hashlib.blake2b(username.strip().lower().encode(), key=key, digest_size=16).digest()
+
+
+class HistoryStore:
+    """Append-only attendance snapshots, safe to share between threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._connection() as conn:
+            old = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'snapshots'").fetchone()
+            if old and conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+                conn.executescript("BEGIN;" + MIGRATE_V0 + "COMMIT;")
+            else:
+                conn.executescript(SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def record(self, username, records, fetched_at):
+        """Store the subjects whose counts changed; return how many rows were added."""
+        student = student_key(username)
+        with self._write_lock, self._connection() as conn:
+            previous = {
+                (subject, type_): (attended, total)
+                for subject, type_, attended, total in conn.execute(
+                    "SELECT subject, type, attended, total FROM latest WHERE student = ?", (student,))
+            }
+            changed = [
+                (student, record["Subject"], _type(record), fetched_at, record["Attended"], record["Total"])
+                for record in records
+                if previous.get((record["Subject"], _type(record))) != (record["Attended"], record["Total"])
+            ]
+            conn.executemany("INSERT OR IGNORE INTO snapshots VALUES (?, ?, ?, ?, ?, ?)", changed)
+            conn.executemany("INSERT OR REPLACE INTO latest VALUES (?, ?, ?, ?, ?, ?)", changed)
+        return len(changed)
+
+    def visit(self, username, seen_at):
+        """Mark the data as of ``seen_at`` as seen; return the previous visit's time or None."""
+        student = student_key(username)
+        with self._write_lock, self._connection() as conn:
+            row = conn.execute("SELECT visited_at FROM visits WHERE student = ?", (student,)).fetchone()
+            conn.execute("INSERT OR REPLACE INTO visits VALUES (?, ?)",
+                         (student, max(seen_at, row[0]) if row else seen_at))
+        return row[0] if row else None
+
+    def trend(self, username, since=None):
+        """``(subject, fetched_at, attended, total)`` rows in time order for each subject.
+
+        ``subject`` is labelled with its type, e.g. "DBMS (Theory)".
+        """
+        query = "SELECT subject || ' (' || type || ')', fetched_at, attended, total FROM snapshots WHERE student = ?"
+        params = [student_key(username)]
+        if since is not None:
+            query += " AND fetched_at >= ?"
+            params.append(since)
+        return self._connection().execute(query + " ORDER BY subject, type, fetched_at", params).fetchall()
+
+    def changes_since(self, username, since):
+        """Lectures attended and held per subject between ``since`` and the latest fetch.
+
+        Returns ``(subject, attended_delta, total_delta)`` for subjects that
+        changed, labelled as in ``trend``; a subject first seen after
+        ``since`` counts from zero.
+        """
+        rows = self._connection().execute(
+            """
+            SELECT l.subject || ' (' || l.type || ')', l.attended, l.total, s.attended, s.total
+            FROM latest l
+            LEFT JOIN snapshots s
+                ON s.student = l.student AND s.subject = l.subject AND s.type = l.type AND s.fetched_at = (
+                    SELECT MAX(fetched_at) FROM snapshots
+                    WHERE student = l.student AND subject = l.subject AND type = l.type AND fetched_at <= ?
+                )
+            WHERE l.student = ?
+            ORDER BY l.subject, l.type
+            """,
+            (since, student_key(username)),
+        )
+        changes = []
+        for subject, attended, total, attended_before, total_before in rows:
+            attended_before, total_before = attended_before or 0, total_before or 0
+            if (attended, total) != (attended_before, total_before):
+                changes.append((subject, attended - attended_before, total - total_before))
+        return changes
+
+
+def _type(record):
+    return record.get("Type") or "Unknown"
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide store, or None when ``HISTORY_DB`` or ``HISTORY_SALT`` is empty."""
+    global _store
+    if not config.HISTORY_DB or not config.HISTORY_SALT:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore(config.HISTORY_DB)
+        return _store
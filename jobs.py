@@ -0,0 +1,163 @@
+"""Run fetches on a bounded pool of background workers.
+
+A Streamlit session submits a fetch and polls for it instead of holding its
+script thread for the whole scrape. At most ``FETCH_WORKERS`` fetches run at
+once and ``FETCH_QUEUE_SIZE`` wait behind them; past that ``submit`` raises
+``Busy`` with an estimate of when to retry, so a rush of users queues up
+instead of starting more browsers than the host can hold.
+
+Code running inside a job can call ``progress("Logging in")`` to publish
+what it is doing; outside a job the call does nothing.
+"""
+import math
+import secrets
+import threading
+import time
+from collections import deque
+
+import config
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_current = threading.local()
+
+
+class Busy(Exception):
+    """Raised when the queue is full; ``retry_after`` is in whole seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"The server is busy, please retry in {retry_after} s")
+        self.retry_after = retry_after
+
+
+class Job:
+    def __init__(self, fn, args, kwargs):
+        self.id = secrets.token_urlsafe(16)
+        self.state = QUEUED
+        self.phase = "Waiting in queue"
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._call = (fn, args, kwargs)
+        self._finished = threading.Event()
+
+    @property
+    def done(self):
+        return self.state in (DONE, FAILED)
+
+    def wait(self, timeout=None):
+        """Block until the job has finished; return False if ``timeout`` ran out."""
+        return self._finished.wait(timeout)
+
+
+def progress(phase):
+    """Report the current phase of the job running on this thread."""
+    job = getattr(_current, "job", None)
+    if job is not None:
+        job.phase = phase
+
+
+class JobQueue:
+    def __init__(self, workers=None, max_queued=None, keep_finished=None):
+        self.workers = workers or config.FETCH_WORKERS
+        self.max_queued = config.FETCH_QUEUE_SIZE if max_queued is None else max_queued
+        self.keep_finished = keep_finished or config.JOB_RESULT_TTL
+        self._pending = deque()
+        self._jobs = {}
+        self._running = 0
+        # Seconds a fetch takes, smoothed; seeds the first estimates
+        self._average = 10.0
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue ``fn(*args, **kwargs)`` and return its Job, or raise Busy."""
+        with self._cond:
+            self._purge()
+            if len(self._pending) >= self.max_queued:
+                raise Busy(self._retry_after())
+            job = Job(fn, args, kwargs)
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"fetch-job-{len(self._threads)}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify()
+            return job
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def position(self, job):
+        """1-based place of a queued job in line, or 0 once it has started."""
+        with self._cond:
+            try:
+                return self._pending.index(job) + 1
+            except ValueError:
+                return 0
+
+    def estimated_wait(self, job):
+        """Rough seconds until ``job`` starts."""
+        position = self.position(job)
+        return math.ceil(position / self.workers) * self._average if position else 0.0
+
+    def stats(self):
+        with self._cond:
+            return {"running": self._running, "queued": len(self._pending), "workers": self.workers,
+                    "max_queued": self.max_queued, "average_seconds": self._average}
+
+    def _retry_after(self):
+        # A queue slot frees up each time a running fetch finishes
+        return max(1, math.ceil(self._average / self.workers))
+
+    def _purge(self):
+        cutoff = time.time() - self.keep_finished
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                job = self._pending.popleft()
+                self._running += 1
+                job.started_at = time.time()
+                job.state = RUNNING
+                job.phase = "Starting"
+            self._run(job)
+            with self._cond:
+                self._running -= 1
+                self._average = 0.8 * self._average + 0.2 * (job.finished_at - job.started_at)
+
+    def _run(self, job):
+        fn, args, kwargs = job._call
+        _current.job = job
+        try:
+            job.result = fn(*args, **kwargs)
+        except Exception as e:
+            job.error = e
+        finally:
+            _current.job = None
+            job._call = None
+            job.finished_at = time.time()
+            # Set last: a done job must have its result and finish time
+            job.state = FAILED if job.error is not None else DONE
+            job._finished.set()
+
+
+_shared_queue = None
+_shared_lock = threading.Lock()
+
+
+def get_queue():
+    """Return the process-wide fetch queue."""
+    global _shared_queue
+    with _shared_lock:
+        if _shared_queue is None:
+            _shared_queue = JobQueue()
+        return _shared_queue
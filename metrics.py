@@ -0,0 +1,134 @@
+"""Per-phase timings and counters for fetching and rendering.
+
+Wrap a step in ``with metrics.phase("login"):`` to record how long it took
+and whether it raised. Recent samples are kept per phase for p50/p95, and
+totals are exported in Prometheus text format or as JSON. When
+``METRICS_ENABLED`` is off, ``phase`` hands back a shared no-op context
+and ``count`` returns immediately, so instrumented code pays nothing.
+"""
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=config.METRICS_WINDOW))
+_totals = defaultdict(lambda: {"count": 0, "failures": 0, "seconds": 0.0})
+_counters = defaultdict(int)
+_server = None
+
+
+def enabled():
+    return config.METRICS_ENABLED
+
+
+def phase(name):
+    """Time the enclosed block as phase ``name``."""
+    if not config.METRICS_ENABLED:
+        return _NOOP
+    return _timed(name)
+
+
+@contextmanager
+def _timed(name):
+    start = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        record(name, time.perf_counter() - start, ok)
+
+
+def record(name, seconds, ok=True):
+    if not config.METRICS_ENABLED:
+        return
+    with _lock:
+        _samples[name].append(seconds)
+        totals = _totals[name]
+        totals["count"] += 1
+        totals["seconds"] += seconds
+        if not ok:
+            totals["failures"] += 1
+    if config.METRICS_LOG:
+        logger.info(json.dumps({"phase": name, "seconds": round(seconds, 4), "ok": ok, "ts": time.time()}))
+
+
+def count(name, value=1):
+    if not config.METRICS_ENABLED or not value:
+        return
+    with _lock:
+        _counters[name] += value
+
+
+def _quantile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def snapshot():
+    """Return the current phases and counters as plain data."""
+    with _lock:
+        phases = {}
+        for name, totals in _totals.items():
+            ordered = sorted(_samples[name])
+            phases[name] = dict(totals, p50=_quantile(ordered, 0.5), p95=_quantile(ordered, 0.95))
+        return {"phases": phases, "counters": dict(_counters)}
+
+
+def render_prometheus():
+    data = snapshot()
+    lines = [
+        "# HELP attendance_phase_seconds Time spent in each fetch and render phase.",
+        "# TYPE attendance_phase_seconds summary",
+    ]
+    for name, stats in sorted(data["phases"].items()):
+        lines.append(f'attendance_phase_seconds{{phase="{name}",quantile="0.5"}} {stats["p50"]:.6f}')
+        lines.append(f'attendance_phase_seconds{{phase="{name}",quantile="0.95"}} {stats["p95"]:.6f}')
+        lines.append(f'attendance_phase_seconds_sum{{phase="{name}"}} {stats["seconds"]:.6f}')
+        lines.append(f'attendance_phase_seconds_count{{phase="{name}"}} {stats["count"]}')
+    lines.append("# TYPE attendance_phase_failures_total counter")
+    for name, stats in sorted(data["phases"].items()):
+        lines.append(f'attendance_phase_failures_total{{phase="{name}"}} {stats["failures"]}')
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f"# TYPE attendance_{name}_total counter")
+        lines.append(f"attendance_{name}_total {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = render_prometheus().encode(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port=None):
+    """Serve /metrics and /metrics.json on ``port`` once per process."""
+    global _server
+    port = port or config.METRICS_PORT
+    with _lock:
+        if _server is None and config.METRICS_ENABLED and port:
+            _server = ThreadingHTTPServer((config.METRICS_HOST, port), _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
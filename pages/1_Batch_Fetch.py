@@ -0,0 +1,92 @@
+import datetime
+import io
+
+import pandas as pd
+import streamlit as st
+
+import config
+from batch import COLUMNS, BatchRun, error_row, read_credentials, result_rows
+
+st.set_page_config(page_title="Batch Fetch | PCCOE Attendance Tracker", page_icon="📋", layout="wide")
+
+st.markdown("## 📋 Batch Attendance Fetch")
+st.markdown(
+    "Upload a CSV with `username` and `password` columns to fetch attendance for a whole division. "
+    "Results appear as each student finishes; a failed login does not hold up the rest."
+)
+
+uploaded = st.file_uploader("Credentials CSV", type=["csv"])
+workers = st.slider("Concurrent fetches", min_value=1, max_value=16, value=config.BATCH_WORKERS,
+                    help="Fetches share the server's job queue with everyone else, so fewer may run at once.")
+running = "batch_run" in st.session_state and not st.session_state["batch_run"].done
+start = st.button("Fetch All", disabled=uploaded is None or running, use_container_width=True)
+
+
+def _tables(run):
+    rows = []
+    errors = []
+    for result in list(run.results):
+        if result.error:
+            errors.append(error_row(result))
+        else:
+            rows.extend(result_rows(result))
+    return pd.DataFrame(rows, columns=COLUMNS), pd.DataFrame(errors, columns=["Username", "Error", "Seconds"])
+
+
+@st.fragment(run_every=config.JOB_POLL_INTERVAL)
+def _show_batch():
+    # Reruns on its own timer, so no script thread waits on the batch
+    run = st.session_state.get("batch_run")
+    if run is None or run.done:
+        st.rerun()
+    done = len(run.results)
+    st.progress(done / run.total, text=f"{done} / {run.total} students")
+    st.dataframe(_tables(run)[0], use_container_width=True, hide_index=True)
+
+
+if start and uploaded is not None:
+    try:
+        credentials = read_credentials(uploaded.getvalue())
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+    st.session_state.pop("batch", None)
+    st.session_state["batch_run"] = BatchRun(credentials, workers)
+
+run = st.session_state.get("batch_run")
+if run is not None and not run.done:
+    _show_batch()
+elif run is not None:
+    del st.session_state["batch_run"]
+    if run.error is not None:
+        st.error(f"The batch stopped early: {run.error}")
+    combined, error_report = _tables(run)
+    st.success(f"Fetched {len(run.results) - len(error_report)} of {run.total} students.")
+    st.session_state["batch"] = (combined, error_report)
+
+if "batch" in st.session_state:
+    combined, error_report = st.session_state["batch"]
+    stamp = datetime.datetime.now().strftime('%Y%m%d')
+    st.dataframe(combined, use_container_width=True, hide_index=True)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button("📥 Download CSV", combined.to_csv(index=False), file_name=f"attendance_batch_{stamp}.csv",
+                           mime="text/csv", use_container_width=True)
+    with col2:
+        try:
+            parquet = io.BytesIO()
+            combined.to_parquet(parquet, index=False)
+        except ImportError:
+            st.caption("Install pyarrow to download Parquet.")
+        else:
+            st.download_button("📥 Download Parquet", parquet.getvalue(), file_name=f"attendance_batch_{stamp}.parquet",
+                               mime="application/octet-stream", use_container_width=True)
+    with col3:
+        st.download_button("📥 Download Error Report", error_report.to_csv(index=False),
+                           file_name=f"attendance_batch_errors_{stamp}.csv", mime="text/csv",
+                           use_container_width=True, disabled=error_report.empty)
+
+    if not error_report.empty:
+        st.markdown(f"### Failed Students ({len(error_report)})")
+        st.dataframe(error_report, use_container_width=True, hide_index=True)
@@ -0,0 +1,48 @@
+import pandas as pd
+import streamlit as st
+
+import cache
+import config
+import jobs
+import metrics
+
+st.set_page_config(page_title="Metrics | PCCOE Attendance Tracker", page_icon="⏱️", layout="wide")
+
+st.markdown("## ⏱️ Fetch & Render Metrics")
+
+if not metrics.enabled():
+    st.info("Metrics are off. Set `METRICS_ENABLED=1` and restart the app to record per-phase timings.")
+    st.stop()
+
+if config.METRICS_PORT:
+    st.caption(f"Prometheus metrics are served on port {config.METRICS_PORT} at `/metrics` and `/metrics.json`.")
+
+data = metrics.snapshot()
+if data["phases"]:
+    phases = pd.DataFrame([
+        {
+            "Phase": name,
+            "Count": stats["count"],
+            "Failures": stats["failures"],
+            "p50 (ms)": stats["p50"] * 1000,
+            "p95 (ms)": stats["p95"] * 1000,
+            "Total (s)": stats["seconds"],
+        }
+        for name, stats in sorted(data["phases"].items())
+    ])
+    st.dataframe(phases, use_container_width=True, hide_index=True,
+                 column_config={"p50 (ms)": st.column_config.NumberColumn(format="%.1f"),
+                                "p95 (ms)": st.column_config.NumberColumn(format="%.1f"),
+                                "Total (s)": st.column_config.NumberColumn(format="%.2f")})
+else:
+    st.write("No phases recorded yet.")
+
+st.markdown("### Counters")
+counters = dict(data["counters"])
+counters.update({f"result_cache_{key}": value for key, value in cache.results.stats().items()})
+counters.update({f"fetch_queue_{key}": value for key, value in jobs.get_queue().stats().items()})
+st.dataframe(pd.DataFrame(sorted(counters.items()), columns=["Counter", "Value"]),
+             use_container_width=True, hide_index=True)
+
+if st.button("🔄 Refresh"):
+    st.rerun()
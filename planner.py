@@ -0,0 +1,187 @@
+"""Plan days off for the rest of the term against a weekly timetable.
+
+Skipping a day misses every lecture on it, so per-subject "can miss" counts
+overstate what is possible. Given the lectures per subject on each weekday
+and the teaching weeks left, ``plan_bunks`` finds how many of each weekday
+can be skipped so that every subject and the overall total still finish
+the term at the threshold, then spends what is left of each budget on
+single lectures.
+
+There are at most seven weekday types, so the search is over seven integer
+counts, each between 0 and the weeks left. A branch and bound over those
+counts, pruned with the fractional (linear programming) optimum, replaces
+enumerating individual dates and finishes in milliseconds for a full
+semester.
+"""
+import datetime
+from collections import Counter, namedtuple
+
+import numpy as np
+
+import analytics
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+Plan = namedtuple("Plan", ["days", "lectures", "subjects", "overall", "at_risk"])
+
+
+def plan_bunks(records, timetable, weeks, threshold=None):
+    """Most days that can be skipped over the next ``weeks`` weeks.
+
+    ``records`` are attendance records as fetched, and ``timetable`` maps a
+    weekday name to ``{label: lectures that day}``, labelled by
+    ``row_labels``. Returns a Plan:
+
+    - ``days``: weekday -> how many of the remaining ones to skip
+    - ``lectures``: subject -> single lectures that can be skipped on top
+    - ``subjects``: records with the end-of-term Attended, Total and
+      Percentage if the plan is followed, plus the lectures it misses
+    - ``overall``: end-of-term overall percentage under the plan
+    - ``at_risk``: subjects that miss the threshold even attending everything
+    """
+    subjects = row_labels(records)
+    subjects += sorted({s for day in timetable.values() for s in day if s not in subjects})
+    attended = np.array([record["Attended"] for record in records] + [0] * (len(subjects) - len(records)))
+    total = np.array([record["Total"] for record in records] + [0] * (len(subjects) - len(records)))
+
+    days = [day for day in WEEKDAYS if any(timetable.get(day, {}).values())]
+    # Lectures per day type and subject, with the day's total as a last column
+    per_day = np.array([[timetable[day].get(subject, 0) for subject in subjects] for day in days],
+                       dtype=np.int64).reshape(len(days), len(subjects))
+    costs = np.hstack([per_day, per_day.sum(axis=1, keepdims=True)])
+    upcoming = per_day.sum(axis=0) * weeks
+
+    budgets = np.append(
+        analytics.term_budget(attended, total, upcoming, threshold),
+        analytics.term_budget(attended.sum(), total.sum(), upcoming.sum(), threshold),
+    )
+    at_risk = [subjects[i] for i in np.flatnonzero(budgets[:-1] < 0)]
+    budgets = np.maximum(budgets, 0)
+
+    counts = _best_counts(costs, budgets, weeks)
+    used = counts @ costs if len(days) else np.zeros_like(budgets)
+    extra = _spend_leftover(budgets - used, upcoming - used[:-1], attended, total, upcoming)
+
+    missed = used[:-1] + extra
+    final_total = total + upcoming
+    final_attended = attended + upcoming - missed
+    return Plan(
+        days={day: int(count) for day, count in zip(days, counts) if count},
+        lectures={subjects[i]: int(extra[i]) for i in np.flatnonzero(extra)},
+        subjects=[
+            {"Subject": subject, "Attended": int(a), "Total": int(t),
+             "Percentage": analytics.percentage(a, t), "Missed": int(m)}
+            for subject, a, t, m in zip(subjects, final_attended, final_total, missed)
+        ],
+        overall=analytics.percentage(final_attended.sum(), final_total.sum()),
+        at_risk=at_risk,
+    )
+
+
+def row_labels(records):
+    """A unique timetable label per record.
+
+    The subject name, with the type added where a theory and a practical
+    share a name, so their lectures are planned separately.
+    """
+    names = Counter(record["Subject"] for record in records)
+    labels = [
+        record["Subject"] if names[record["Subject"]] == 1 else f"{record['Subject']} ({record.get('Type') or '?'})"
+        for record in records
+    ]
+    seen = Counter()
+    for i, label in enumerate(labels):
+        seen[label] += 1
+        if seen[label] > 1:
+            labels[i] = f"{label} #{seen[label]}"
+    return labels
+
+
+def _best_counts(costs, budgets, weeks):
+    """Maximise the days skipped, ``counts @ costs <= budgets`` with 0 <= counts <= weeks."""
+    n = len(costs)
+    # Cheapest days first, so the first plans found favour light days
+    order = np.argsort(costs[:, -1], kind="stable")
+    ordered = costs[order].astype(float)
+
+    best = [-1, None]
+    counts = np.zeros(n, dtype=np.int64)
+
+    def search(i, left, taken):
+        if i == n:
+            if taken > best[0]:
+                best[0], best[1] = taken, counts.copy()
+            return
+        if taken + np.floor(_lp_bound(ordered[i:], left, weeks) + 1e-9) <= best[0]:
+            return
+        cost = ordered[i]
+        charged = cost > 0
+        most = int(min(weeks, np.floor(left[charged] / cost[charged]).min())) if charged.any() else weeks
+        if i == n - 1:
+            # Nothing left to trade against, so the last day takes all it can
+            counts[i] = most
+            search(n, left, taken + most)
+            counts[i] = 0
+            return
+        for k in range(most, -1, -1):
+            counts[i] = k
+            search(i + 1, left - k * cost, taken + k)
+        counts[i] = 0
+
+    search(0, budgets.astype(float), 0)
+    result = np.zeros(n, dtype=np.int64)
+    result[order] = best[1]
+    return result
+
+
+def _lp_bound(costs, left, weeks):
+    """Upper bound on the days that fit: the optimum with fractional counts.
+
+    A small dense simplex for max sum(k) with ``k @ costs <= left`` and
+    ``0 <= k <= weeks``; the origin is feasible, so no phase one is needed.
+    """
+    n, m = costs.shape[0], costs.shape[1] + costs.shape[0]
+    tableau = np.zeros((m + 1, n + m + 1))
+    tableau[:m, :n] = np.vstack([costs.T, np.eye(n)])
+    tableau[:m, n:n + m] = np.eye(m)
+    tableau[:m, -1] = np.concatenate([left, np.full(n, weeks)])
+    tableau[m, :n] = -1
+    for _ in range(4 * m):
+        entering = np.flatnonzero(tableau[m, :-1] < -1e-9)
+        if not len(entering):
+            return tableau[m, -1]
+        column = tableau[:m, entering[0]]
+        ratios = np.full(m, np.inf)
+        positive = column > 1e-9
+        ratios[positive] = tableau[:m, -1][positive] / column[positive]
+        row = np.argmin(ratios)
+        tableau[row] /= tableau[row, entering[0]]
+        others = np.arange(m + 1) != row
+        tableau[others] -= np.outer(tableau[others, entering[0]], tableau[row])
+    return n * weeks  # did not converge; fall back to the trivial bound
+
+
+def _spend_leftover(left, available, attended, total, upcoming):
+    """Single lectures per subject to skip with the budgets left after whole days.
+
+    The overall budget is shared, so it goes to the subjects that would
+    end the term furthest above the threshold first.
+    """
+    extra = np.minimum(left[:-1], available)
+    overall = left[-1]
+    margin = analytics.percentage(attended + upcoming, total + upcoming)
+    for i in np.argsort(-margin, kind="stable"):
+        extra[i] = min(extra[i], overall)
+        overall -= extra[i]
+    return extra
+
+
+def skip_dates(plan, start, weeks):
+    """Concrete dates for ``plan.days``, spread evenly over ``weeks`` weeks from ``start``."""
+    dates = []
+    for day, count in plan.days.items():
+        offset = (WEEKDAYS.index(day) - start.weekday()) % 7
+        occurrences = [start + datetime.timedelta(days=offset + 7 * week) for week in range(weeks)]
+        picks = np.linspace(0, weeks - 1, count).round().astype(int) if count < weeks else range(weeks)
+        dates.extend(occurrences[i] for i in sorted(set(picks)))
+    return sorted(dates)
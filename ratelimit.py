@@ -0,0 +1,93 @@
+"""Token-bucket rate limiting and retry backoff for requests to the ERP.
+
+Logins and page or API requests draw from separate buckets per ERP origin,
+so a burst of students signing in cannot also starve the navigations of
+those already signed in.
+"""
+import random
+import threading
+import time
+
+import config
+import metrics
+
+
+class Throttled(Exception):
+    """Raised when the ERP rate limit does not allow a request in time."""
+
+
+class TokenBucket:
+    """Allow ``rate`` operations per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Block until a token is available; return False if ``timeout`` runs out first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                if now + wait > deadline:
+                    return False
+            time.sleep(wait)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def limiter_for(origin, kind="login"):
+    """Return the shared ``kind`` bucket ("login" or "request") for ``origin``."""
+    with _buckets_lock:
+        if (origin, kind) not in _buckets:
+            if kind == "login":
+                bucket = TokenBucket(config.ERP_LOGIN_RATE, config.ERP_LOGIN_BURST)
+            elif kind == "request":
+                bucket = TokenBucket(config.ERP_REQUEST_RATE, config.ERP_REQUEST_BURST)
+            else:
+                raise ValueError(f"Unknown rate limit: {kind}")
+            _buckets[origin, kind] = bucket
+        return _buckets[origin, kind]
+
+
+def throttle(kind, origin=None):
+    """Wait for the ERP rate limit before a login or request.
+
+    Raises Throttled if no token frees up within ``ERP_THROTTLE_TIMEOUT``.
+    """
+    bucket = limiter_for(origin or config.ERP_BASE_URL, kind)
+    if bucket.acquire(timeout=0):
+        return
+    metrics.count(f"erp_{kind}s_throttled")
+    if not bucket.acquire(timeout=config.ERP_THROTTLE_TIMEOUT):
+        raise Throttled("The ERP is busy with other requests, please try again in a moment")
+
+
+def backoff(attempt):
+    """Seconds to wait before retry ``attempt`` (0-based), with full jitter."""
+    return random.uniform(0, min(config.RETRY_MAX_DELAY, config.RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def retrying(fn, is_transient, attempts=None):
+    """Call ``fn``, retrying with backoff while ``is_transient(error)`` says so."""
+    attempts = 1 + (config.ERP_RETRIES if attempts is None else attempts)
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts - 1 or not is_transient(e):
+                raise
+        metrics.count("erp_retries")
+        time.sleep(backoff(attempt))
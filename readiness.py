@@ -0,0 +1,133 @@
+"""Explicit waits for the ERP pages, replacing fixed sleeps.
+
+Each wait polls for the condition the next step actually depends on and
+records how long it took, so a fast ERP is not slowed down by worst case
+sleeps and a slow one gets as long as the configured timeout allows.
+"""
+import logging
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import config
+import metrics
+
+logger = logging.getLogger(__name__)
+
+USERNAME_INPUT = (By.XPATH, "//input[@type='text']")
+PASSWORD_INPUT = (By.XPATH, "//input[@type='password']")
+SIGN_IN_BUTTON = (By.XPATH, "//button[contains(@class, 'v-btn') and contains(., 'Sign In')]")
+SUBJECT_BLOCKS = (By.XPATH, "//div[contains(@class, 'v-col-sm-4')]")
+# What the attendance page shows instead of cards for a student with no subjects
+EMPTY_STATE = (By.XPATH, "//*[contains(@class, 'v-empty-state')]")
+
+_HAS_AUTH_TOKEN = """
+try {
+    return Object.keys(window.localStorage).concat(Object.keys(window.sessionStorage))
+        .some(function (key) { return /token|auth/i.test(key); });
+} catch (e) { return false; }
+"""
+
+
+class _left_page:
+    """Logged in once the SPA navigates away from ``login_url`` or stores a token."""
+
+    def __init__(self, login_url):
+        self.login_url = login_url.rstrip("/")
+
+    def __call__(self, driver):
+        if driver.current_url.rstrip("/") != self.login_url:
+            return True
+        return bool(driver.execute_script(_HAS_AUTH_TOKEN))
+
+
+class _stable_elements:
+    """Elements that are present and whose count held steady across one poll."""
+
+    def __init__(self, locator):
+        self.locator = locator
+        self.last_count = None
+
+    def __call__(self, driver):
+        elements = driver.find_elements(*self.locator)
+        count = len(elements)
+        stable = count > 0 and count == self.last_count
+        self.last_count = count
+        return elements if stable else False
+
+
+class _attendance:
+    """``(cards,)`` once the cards are stable, or ``([],)`` once the page says there are none."""
+
+    def __init__(self):
+        self.cards = _stable_elements(SUBJECT_BLOCKS)
+
+    def __call__(self, driver):
+        cards = self.cards(driver)
+        if cards:
+            return (cards,)
+        if driver.find_elements(*EMPTY_STATE):
+            return ([],)
+        return False
+
+
+class Readiness:
+    def __init__(self, driver, poll_interval=None):
+        self.driver = driver
+        self.poll_interval = poll_interval or config.WAIT_POLL_INTERVAL
+        self.timings = {}
+
+    def wait(self, name, condition, timeout, message):
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = WebDriverWait(self.driver, timeout, poll_frequency=self.poll_interval).until(condition, message)
+            ok = True
+            return result
+        finally:
+            self.timings[name] = time.perf_counter() - start
+            metrics.record(f"wait_{name}", self.timings[name], ok)
+            logger.debug("wait %s took %.3fs", name, self.timings[name])
+
+    def login_form(self, timeout=None):
+        """Wait for the login inputs and return (username, password, sign in button)."""
+        timeout = timeout or config.LOGIN_FORM_TIMEOUT
+        self.wait("login_form", EC.visibility_of_element_located(PASSWORD_INPUT), timeout,
+                  "Login page did not load")
+        return (
+            self.driver.find_element(*USERNAME_INPUT),
+            self.driver.find_element(*PASSWORD_INPUT),
+            self.wait("sign_in_button", EC.element_to_be_clickable(SIGN_IN_BUTTON), timeout,
+                      "Sign In button did not become clickable"),
+        )
+
+    def logged_in(self, login_url, timeout=None):
+        """Wait to leave ``login_url``, the address the login form was found at."""
+        self.wait("login", _left_page(login_url), timeout or config.LOGIN_TIMEOUT,
+                  "Login did not complete, check your credentials")
+
+    def subject_blocks(self, timeout=None):
+        """Wait until the subject cards have rendered and stopped changing.
+
+        Returns an empty list only when the page shows its empty state; a
+        page that never renders either raises TimeoutException, so a slow
+        ERP is not mistaken for a student with no subjects.
+        """
+        return self.wait("subject_blocks", _attendance(), timeout or config.ATTENDANCE_TIMEOUT,
+                         "Attendance page did not load")[0]
+
+    def attendance_or_login(self, timeout=None):
+        """Wait for either the subject cards or a login form.
+
+        Returns True when the cards rendered, i.e. an existing session was
+        accepted, and False when the ERP sent us back to sign in.
+        """
+        try:
+            found = self.wait("resume_session", EC.any_of(_attendance(), EC.visibility_of_element_located(PASSWORD_INPUT)),
+                              timeout or config.ATTENDANCE_TIMEOUT, "Attendance page did not load")
+        except TimeoutException:
+            return False
+        return isinstance(found, tuple)
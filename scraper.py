@@ -0,0 +1,240 @@
+"""Fetch a student's attendance from the ERP through the configured backend.
+
+Selenium and the browser helpers are imported the first time a browser is
+needed, so callers that only use the API backend start quickly.
+"""
+import logging
+import sqlite3
+import time
+from collections import namedtuple
+
+import cache
+import config
+import erp_api
+import history
+import jobs
+import metrics
+import ratelimit
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+FetchResult = namedtuple("FetchResult", ["student_name", "records", "skipped", "backend", "fetched_at"])
+
+_STORAGE_DUMP = """
+var items = {};
+for (var i = 0; i < window.localStorage.length; i++) {
+    var key = window.localStorage.key(i);
+    items[key] = window.localStorage.getItem(key);
+}
+return items;
+"""
+
+# Bytes fetched for the current document and everything it loaded
+_TRANSFERRED = """
+return performance.getEntriesByType("navigation").concat(performance.getEntriesByType("resource"))
+    .reduce(function (sum, entry) { return sum + (entry.transferSize || 0); }, 0);
+"""
+
+_STORAGE_LOAD = """
+var items = arguments[0];
+for (var key in items) { window.localStorage.setItem(key, items[key]); }
+"""
+
+# Bare WebDriverException messages for a lost browser or dropped connection
+_CRASH_MESSAGES = ("chrome not reachable", "tab crashed", "session deleted", "disconnected", "net::err_")
+
+# Fetches in progress, keyed by credentials and backend
+_in_flight = SingleFlight()
+
+
+def fetch_records(username, password, backend=None, refresh=False):
+    """Fetch attendance records using ``backend`` ("api" or "selenium").
+
+    Results are served from the shared cache unless ``refresh`` is set, and
+    a cached ERP session is reused to skip the login form on a cache miss.
+    The API backend falls back to the browser when the API cannot be used,
+    but not when it has rejected the credentials.
+
+    Concurrent calls for the same credentials, from two tabs or a double
+    click, share a single fetch.
+    """
+    backend = backend or config.FETCH_BACKEND
+    key = cache.user_key(username)
+    check = cache.credential_check(username, password)
+    if not refresh:
+        hit = cache.results.get(key, check)
+        if hit is not None:
+            metrics.count("fetch_cache_hits")
+            return hit[0]
+
+    result, shared = _in_flight.do((check, backend), lambda: _fetch(key, check, backend, username, password))
+    if shared:
+        metrics.count("fetches_coalesced")
+    return result
+
+
+def _fetch(key, check, backend, username, password):
+    if backend == "api":
+        try:
+            result = _fetch_with(key, check, "api", erp_api.fetch, username, password)
+        except erp_api.InvalidCredentials:
+            raise
+        except erp_api.ErpApiError as e:
+            logger.warning("API fetch failed, falling back to the browser: %s", e)
+        else:
+            return _store(key, check, username, result)
+    elif backend != "selenium":
+        raise ValueError(f"Unknown fetch backend: {backend}")
+
+    result = _fetch_with(key, check, "selenium", _scrape_with_pool, username, password)
+    return _store(key, check, username, result)
+
+
+def _store(key, check, username, result):
+    """Cache a fresh result and add it to the attendance history.
+
+    A result without records is returned but not cached: it is far more
+    likely a page that had not finished loading than a student with no
+    subjects, and caching it would serve the failure until it expired.
+    """
+    if not result.records:
+        metrics.count("empty_results")
+        return result
+    cache.results.put(key, check, result)
+    store = history.get_store()
+    if store is not None:
+        try:
+            metrics.count("history_rows", store.record(username, result.records, result.fetched_at))
+        except sqlite3.Error as e:
+            logger.warning("Could not save attendance history: %s", e)
+    return result
+
+
+def _fetch_with(key, check, backend, fetch, username, password):
+    session_key = f"{backend}:{key}"
+    erp_session = cache.sessions.get(session_key, check)
+    with metrics.phase(f"fetch_{backend}"):
+        student_name, records, skipped, erp_session = fetch(
+            username, password, erp_session=erp_session[0] if erp_session else None)
+    cache.sessions.put(session_key, check, erp_session)
+    metrics.count("subjects_parsed", len(records))
+    metrics.count("subjects_skipped", len(skipped))
+    return FetchResult(student_name, records, skipped, backend, time.time())
+
+
+def _scrape_with_pool(username, password, erp_session=None):
+    from driver_pool import get_pool
+
+    # Rate-limit tokens are taken before leasing a browser, so a throttled
+    # fetch waits without holding one of the few warm browsers
+    def attempt():
+        if erp_session is not None:
+            ratelimit.throttle("request")
+            ratelimit.throttle("request")
+            jobs.progress("Waiting for a browser")
+            with get_pool().lease() as driver:
+                result = resume(driver, erp_session)
+            if result is not None:
+                return result
+        ratelimit.throttle("login")
+        ratelimit.throttle("request")
+        jobs.progress("Waiting for a browser")
+        with get_pool().lease() as driver:
+            return scrape(driver, username, password)
+
+    return ratelimit.retrying(attempt, _is_transient)
+
+
+def _is_transient(error):
+    """Whether a browser fetch failed in a way another try can fix.
+
+    Only a crashed or lost browser and dropped connections qualify. Timeouts
+    are usually a slow ERP or wrong credentials, and missing or stale
+    elements mean the page changed; retrying those only adds logins.
+    """
+    from selenium.common.exceptions import InvalidSessionIdException, NoSuchWindowException, WebDriverException
+    from urllib3.exceptions import HTTPError
+
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException, ConnectionError, HTTPError)):
+        return True
+    # Chrome reports these as a bare WebDriverException with a message
+    return type(error) is WebDriverException and any(
+        marker in (error.msg or "").lower() for marker in _CRASH_MESSAGES)
+
+
+def scrape(driver, username, password):
+    """Sign in and read the attendance cards through the ERP web page.
+
+    Returns ``(student_name, records, skipped, erp_session)``, where
+    ``erp_session`` holds the cookies and local storage needed to skip the
+    login form next time. The caller takes the rate-limit tokens: one login
+    and one request.
+    """
+    from readiness import Readiness
+
+    ready = Readiness(driver)
+    jobs.progress("Logging in")
+    with metrics.phase("login"):
+        driver.get(config.ERP_BASE_URL + "/")
+        username_input, password_input, sign_in_button = ready.login_form()
+        # The SPA may have redirected to its own login route; wait to leave that
+        login_url = driver.current_url
+        username_input.send_keys(username)
+        password_input.send_keys(password)
+        sign_in_button.click()
+        ready.logged_in(login_url)
+    _count_transferred(driver)
+
+    jobs.progress("Opening the attendance page")
+    with metrics.phase("navigate"):
+        driver.get(config.ERP_BASE_URL + "/attendance")
+        ready.subject_blocks()
+    return _read(driver)
+
+
+def resume(driver, erp_session):
+    """Like ``scrape`` but with a saved ERP session; None if it has expired.
+
+    The caller takes the rate-limit tokens: two requests.
+    """
+    from readiness import Readiness
+
+    if not _resume(driver, Readiness(driver), erp_session):
+        return None
+    return _read(driver)
+
+
+def _read(driver):
+    from extraction import extract_attendance
+
+    jobs.progress("Reading attendance")
+    with metrics.phase("extract"):
+        student_name, records, skipped = extract_attendance(driver)
+    _count_transferred(driver)
+    erp_session = {"cookies": driver.get_cookies(), "storage": driver.execute_script(_STORAGE_DUMP)}
+    return student_name, records, skipped, erp_session
+
+
+def _count_transferred(driver):
+    if metrics.enabled():
+        metrics.count("bytes_transferred", driver.execute_script(_TRANSFERRED) or 0)
+
+
+def _resume(driver, ready, erp_session):
+    """Restore a saved ERP session and open the attendance page with it."""
+    from selenium.common.exceptions import WebDriverException
+
+    # Cookies and storage can only be set while on the ERP's origin
+    metrics.count("session_resumes_attempted")
+    jobs.progress("Resuming your ERP session")
+    driver.get(config.ERP_BASE_URL + "/")
+    try:
+        for cookie in erp_session["cookies"]:
+            driver.add_cookie({k: v for k, v in cookie.items() if k != "sameSite"})
+        driver.execute_script(_STORAGE_LOAD, erp_session["storage"])
+    except WebDriverException as e:
+        logger.info("Could not restore ERP session, signing in again: %s", e)
+        return False
+    driver.get(config.ERP_BASE_URL + "/attendance")
+    return ready.attendance_or_login()
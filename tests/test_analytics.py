@@ -0,0 +1,62 @@
+"""The closed-form counts against the loops they replaced."""
+import random
+
+import numpy as np
+import pytest
+
+import analytics
+
+THRESHOLDS = [50, 60, 66.6, 70, 75, 80, 85, 92.5]
+
+
+def loop_bunk_limit(attended, total, threshold):
+    lectures_to_bunk = 0
+    while ((attended / (total + lectures_to_bunk)) * 100) >= threshold:
+        lectures_to_bunk += 1
+    return lectures_to_bunk - 1
+
+
+def loop_lectures_to_attend(attended, total, threshold):
+    additional_lectures = 0
+    while ((attended + additional_lectures) / (total + additional_lectures)) * 100 < threshold:
+        additional_lectures += 1
+    return additional_lectures
+
+
+def random_pairs(seed, count=2000, most=400):
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        total = rng.randint(1, most)
+        pairs.append((rng.randint(0, total), total))
+    return pairs
+
+
+@pytest.mark.parametrize("threshold", THRESHOLDS)
+def test_bunk_limit_matches_loop(threshold):
+    for attended, total in random_pairs(threshold):
+        # The loop answers -1 below the threshold; the closed form clamps to 0
+        expected = max(loop_bunk_limit(attended, total, threshold), 0)
+        assert analytics.bunk_limit(attended, total, threshold) == expected, (attended, total)
+
+
+@pytest.mark.parametrize("threshold", THRESHOLDS)
+def test_lectures_to_attend_matches_loop(threshold):
+    for attended, total in random_pairs(threshold):
+        expected = loop_lectures_to_attend(attended, total, threshold)
+        assert analytics.lectures_to_attend(attended, total, threshold) == expected, (attended, total)
+
+
+@pytest.mark.parametrize("threshold", [60, 75])
+def test_columns_match_scalars(threshold):
+    attended, total = map(np.array, zip(*random_pairs(threshold, count=500)))
+    assert analytics.bunk_limit(attended, total, threshold).tolist() == [
+        analytics.bunk_limit(int(a), int(t), threshold) for a, t in zip(attended, total)]
+    assert analytics.lectures_to_attend(attended, total, threshold).tolist() == [
+        analytics.lectures_to_attend(int(a), int(t), threshold) for a, t in zip(attended, total)]
+
+
+@pytest.mark.parametrize("threshold", [0, 100, -5, 120])
+def test_rejects_thresholds_out_of_range(threshold):
+    with pytest.raises(ValueError):
+        analytics.bunk_limit(10, 12, threshold)
@@ -0,0 +1,37 @@
+"""Rendering many charts must not leave figures or cached images behind."""
+import gc
+
+import matplotlib.pyplot as plt
+import pytest
+from matplotlib.figure import Figure
+
+import charts
+import config
+
+CHARTS = 1000
+
+
+def live_figures():
+    gc.collect()
+    return sum(isinstance(obj, Figure) for obj in gc.get_objects())
+
+
+@pytest.mark.slow
+def test_rendering_1000_charts_does_not_leak(monkeypatch):
+    # Drawing dominates the run time; small images keep it to what it must be
+    monkeypatch.setattr(config, "CHART_DPI", 10)
+    figures_before = live_figures()
+    for i in range(CHARTS // 2):
+        subjects = [{"Subject": f"Subject {j}", "Percentage": (i * 7 + j * 13) % 100} for j in range(4)]
+        bar = charts.generate_chart(subjects, f"Chart {i}", ["#4CAF50", "#f44336", "#2196F3", "#FFC107"], fmt="png")
+        pie = charts.generate_pie_chart(i + 1, 2 * i + 3, fmt="png")
+        assert bar.startswith(b"\x89PNG") and pie.startswith(b"\x89PNG")
+
+        assert plt.get_fignums() == []
+        info = charts.cache_info()
+        assert info["bar"].currsize <= config.CHART_CACHE_SIZE
+        assert info["pie"].currsize <= config.CHART_CACHE_SIZE
+
+    info = charts.cache_info()
+    assert info["bar"].misses >= CHARTS // 2 and info["pie"].misses >= CHARTS // 2
+    assert live_figures() <= figures_before
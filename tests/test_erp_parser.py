@@ -0,0 +1,47 @@
+"""Parsing saved attendance pages, using pages rendered by erp_stub."""
+import erp_parser
+import erp_stub
+
+
+def test_reads_every_card():
+    subjects = erp_stub.make_subjects(12)
+    page = erp_parser.parse_html(erp_stub.render_attendance_page(subjects, student_name="Asha Rao"))
+    assert page.student_name == "Asha Rao"
+    assert page.skipped == [] and page.mismatches == []
+    assert [(r["Subject"], r["Attended"], r["Total"], r["Percentage"], r["Type"]) for r in page.records] == [
+        (s["subject"], s["attended"], s["total"], s["percentage"], s["type"]) for s in subjects]
+
+
+def test_skip_reasons():
+    subjects = erp_stub.make_subjects(3)
+    subjects[1] = dict(subjects[1], attended=0, total=0, percentage=0)
+    html = erp_stub.render_attendance_page(subjects)
+    # Drop the third card's percentage ring
+    ring = '<div class="v-progress-circular__content">%s%%</div>' % subjects[2]["percentage"]
+    assert ring in html
+    page = erp_parser.parse_html(html.replace(ring, ""))
+    assert [r["Subject"] for r in page.records] == [subjects[0]["subject"]]
+    assert page.skipped == [erp_parser.Skipped(1, erp_parser.NO_LECTURES),
+                            erp_parser.Skipped(2, "missing percentage")]
+
+
+def test_flags_a_wrong_percentage():
+    subjects = erp_stub.make_subjects(4)
+    subjects[2] = dict(subjects[2], percentage=subjects[2]["percentage"] + 10)
+    page = erp_parser.parse_html(erp_stub.render_attendance_page(subjects))
+    assert page.mismatches == [erp_parser.Mismatch(
+        subjects[2]["subject"], subjects[2]["percentage"],
+        round(subjects[2]["attended"] / subjects[2]["total"] * 100, 2))]
+
+
+def test_empty_state_has_no_records():
+    page = erp_parser.parse_html(erp_stub.render_attendance_page([]))
+    assert page.records == [] and page.skipped == []
+
+
+def test_parses_a_directory_of_saved_pages(tmp_path):
+    for count in (2, 5, 9):
+        (tmp_path / f"page_{count}.html").write_text(erp_stub.render_attendance_page(erp_stub.make_subjects(count)))
+    (tmp_path / "notes.txt").write_text("not a page")
+    pages = list(erp_parser.parse_directory(str(tmp_path)))
+    assert [len(page.records) for _, page in pages] == [2, 5, 9]
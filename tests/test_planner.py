@@ -0,0 +1,103 @@
+"""The day-off planner against exhaustive search over small timetables."""
+import itertools
+import random
+import time
+from fractions import Fraction
+
+import planner
+
+THRESHOLD = 75
+
+
+def random_case(rng, subjects, days, weeks):
+    records = []
+    for i in range(subjects):
+        total = rng.randint(5, 60)
+        records.append({"Subject": f"S{i}", "Attended": rng.randint(total // 2, total), "Total": total})
+    timetable = {
+        day: {f"S{i}": rng.randint(0, 2) for i in range(subjects) if rng.random() < 0.5}
+        for day in planner.WEEKDAYS[:days]
+    }
+    return records, timetable, weeks
+
+
+def budget(attended, total, upcoming, threshold):
+    # Most of ``upcoming`` lectures that can be missed ending at ``threshold``
+    return (attended + upcoming - Fraction(threshold, 100) * (total + upcoming)).__floor__()
+
+
+def brute_force_days(records, timetable, weeks, threshold):
+    """Most whole days that fit every subject's and the overall budget."""
+    days = [day for day in planner.WEEKDAYS if any(timetable.get(day, {}).values())]
+    upcoming = {r["Subject"]: sum(timetable[day].get(r["Subject"], 0) for day in days) * weeks for r in records}
+    budgets = {r["Subject"]: max(budget(r["Attended"], r["Total"], upcoming[r["Subject"]], threshold), 0)
+               for r in records}
+    overall = max(budget(sum(r["Attended"] for r in records), sum(r["Total"] for r in records),
+                         sum(upcoming.values()), threshold), 0)
+    best = 0
+    for counts in itertools.product(range(weeks + 1), repeat=len(days)):
+        missed = {s: sum(k * timetable[day].get(s, 0) for k, day in zip(counts, days)) for s in budgets}
+        if all(missed[s] <= budgets[s] for s in budgets) and sum(missed.values()) <= overall:
+            best = max(best, sum(counts))
+    return best
+
+
+def test_matches_exhaustive_search():
+    rng = random.Random(1)
+    for _ in range(300):
+        records, timetable, weeks = random_case(rng, rng.randint(1, 5), rng.randint(1, 4), rng.randint(1, 4))
+        plan = planner.plan_bunks(records, timetable, weeks, THRESHOLD)
+        assert sum(plan.days.values()) == brute_force_days(records, timetable, weeks, THRESHOLD), (records, timetable)
+
+
+def test_plan_keeps_every_subject_at_threshold():
+    rng = random.Random(2)
+    for _ in range(300):
+        records, timetable, weeks = random_case(rng, rng.randint(1, 8), rng.randint(1, 6), rng.randint(1, 10))
+        plan = planner.plan_bunks(records, timetable, weeks, THRESHOLD)
+        for row in plan.subjects:
+            if row["Subject"] not in plan.at_risk:
+                assert row["Attended"] * 100 >= THRESHOLD * row["Total"], row
+            elif row["Total"]:
+                # Nothing is skipped for a subject that cannot make it anyway
+                assert row["Missed"] == 0, row
+        attended = sum(row["Attended"] for row in plan.subjects)
+        total = sum(row["Total"] for row in plan.subjects)
+        if not plan.at_risk and total:
+            assert attended * 100 >= THRESHOLD * total
+
+
+def test_at_risk_lists_subjects_that_cannot_recover():
+    records = [
+        {"Subject": "Safe", "Attended": 60, "Total": 60},
+        {"Subject": "Hopeless", "Attended": 0, "Total": 4},
+    ]
+    timetable = {"Monday": {"Safe": 1, "Hopeless": 1}, "Tuesday": {"Safe": 2}}
+    plan = planner.plan_bunks(records, timetable, 4, THRESHOLD)
+    assert plan.at_risk == ["Hopeless"]
+    # Every Monday has a Hopeless lecture, so only Tuesdays can go
+    assert plan.days == {"Tuesday": 4}
+
+
+def test_theory_and_practical_with_one_name_are_planned_separately():
+    records = [
+        {"Subject": "DBMS", "Type": "Theory", "Attended": 40, "Total": 40},
+        {"Subject": "DBMS", "Type": "Practical", "Attended": 14, "Total": 20},
+    ]
+    labels = planner.row_labels(records)
+    assert labels == ["DBMS (Theory)", "DBMS (Practical)"]
+    plan = planner.plan_bunks(records, {"Monday": {labels[0]: 2}, "Friday": {labels[1]: 2}}, 5, THRESHOLD)
+    # Theory can lose every Monday; a whole Friday would sink the practical
+    assert plan.days == {"Monday": 5}
+    assert [row["Missed"] for row in plan.subjects] == [10, 1]
+
+
+def test_full_semester_plans_quickly():
+    rng = random.Random(3)
+    worst = 0.0
+    for _ in range(5):
+        records, timetable, weeks = random_case(rng, 15, 6, 30)
+        start = time.perf_counter()
+        planner.plan_bunks(records, timetable, weeks, THRESHOLD)
+        worst = max(worst, time.perf_counter() - start)
+    assert worst < 2.0